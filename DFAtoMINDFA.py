@@ -1,5 +1,7 @@
 from collections import deque
 
+from charclass import find_symbol
+
 def find(parent, i):
     """Find the root of element i with path compression."""
     if parent[i] != i:
@@ -14,7 +16,20 @@ def union(parent, i, j):
         parent[pi] = pj
 
 # Minimize the DFA
-def minimize_dfa(dfa_states, dfa_transitions, dfa_accepting, alphabet):
+def minimize_dfa(dfa_states, dfa_transitions, dfa_accepting, alphabet, method="hopcroft", tags=None):
+    """Minimize the DFA with the selected method ('hopcroft' or 'table').
+
+    tags optionally maps each accepting DFA state to a label (e.g. a lexer
+    rule number); accepting states with different labels are never merged.
+    """
+    if method == "hopcroft":
+        return hopcroft_minimize(dfa_states, dfa_transitions, dfa_accepting, alphabet, tags)
+    if method == "table":
+        return table_filling_minimize(dfa_states, dfa_transitions, dfa_accepting, alphabet, tags)
+    raise ValueError(f"Unknown minimization method: {method}")
+
+# Minimize the DFA with the pairwise table-filling method
+def table_filling_minimize(dfa_states, dfa_transitions, dfa_accepting, alphabet, tags=None):
     """Minimize the DFA using the table-filling method."""
     if not dfa_states:
         return [], {}, None, set()
@@ -26,7 +41,7 @@ def minimize_dfa(dfa_states, dfa_transitions, dfa_accepting, alphabet):
         for j in range(i + 1, len(dfa_states)):
             state_i = dfa_states[i]
             state_j = dfa_states[j]
-            if (state_i in dfa_accepting) != (state_j in dfa_accepting):
+            if _acceptance(state_i, dfa_accepting, tags) != _acceptance(state_j, dfa_accepting, tags):
                 distinguishable.add((i, j))
     
     # Mark distinguishable pairs iteratively
@@ -94,6 +109,123 @@ def minimize_dfa(dfa_states, dfa_transitions, dfa_accepting, alphabet):
     
     return min_dfa_states, min_dfa_transitions, min_dfa_initial, min_dfa_accepting
 
+def _acceptance(state, dfa_accepting, tags):
+    """Initial partition key of a DFA state: None if rejecting, else its tag (True without tags)."""
+    if state not in dfa_accepting:
+        return None
+    return True if tags is None else tags[state]
+
+# Hopcroft's partition refinement over a dense transition table
+def hopcroft_blocks(delta, keys):
+    """Partition states 0..n-1 plus a virtual sink n into equivalence classes.
+
+    delta[a][i] is the successor of state i on symbol index a (n for none,
+    and delta[a][n] == n). keys[i] is the initial partition key of state i:
+    None for rejecting states, which share a block with the sink. Returns
+    the list of blocks (sets of state numbers).
+    """
+    n = len(keys)
+    sink = n
+
+    # Inverse-transition index: inverse[a][t] lists the states entering t on a
+    inverse = []
+    for row in delta:
+        inv = [[] for _ in range(n + 1)]
+        for source, target in enumerate(row):
+            inv[target].append(source)
+        inverse.append(inv)
+
+    # Initial partition: non-accepting (with the sink) vs. accepting, split further by tag
+    groups = {None: {sink}}
+    for i, key in enumerate(keys):
+        groups.setdefault(key, set()).add(i)
+    blocks = list(groups.values())
+    block_of = [0] * (n + 1)
+    for block_id, block in enumerate(blocks):
+        for i in block:
+            block_of[i] = block_id
+
+    # Worklist of (splitter block, symbol index) pairs; every block but the largest starts in it
+    largest = max(range(len(blocks)), key=lambda b: len(blocks[b]))
+    worklist = [(b, a) for b in range(len(blocks)) if b != largest for a in range(len(delta))]
+    pending = set(worklist)
+
+    while worklist:
+        splitter = worklist.pop()
+        pending.discard(splitter)
+        block_id, a = splitter
+        inv = inverse[a]
+
+        # States with an a-transition into the splitter, grouped by block
+        touched = {}
+        for target in list(blocks[block_id]):
+            for source in inv[target]:
+                touched.setdefault(block_of[source], set()).add(source)
+
+        for y, hit in touched.items():
+            if len(hit) == len(blocks[y]):
+                continue
+            # Shrink Y in place and relabel only the split-off states: O(|hit|) per split
+            rest = blocks[y]
+            rest -= hit
+            new_id = len(blocks)
+            blocks.append(hit)
+            for i in hit:
+                block_of[i] = new_id
+            for c in range(len(delta)):
+                if (y, c) in pending:
+                    entry = (new_id, c)
+                else:
+                    entry = (y, c) if len(rest) <= len(hit) else (new_id, c)
+                pending.add(entry)
+                worklist.append(entry)
+
+    return blocks
+
+# Minimize the DFA with Hopcroft's partition refinement
+def hopcroft_minimize(dfa_states, dfa_transitions, dfa_accepting, alphabet, tags=None):
+    """Minimize the DFA using Hopcroft's O(n·k·log n) partition refinement."""
+    if not dfa_states:
+        return [], {}, None, set()
+    n = len(dfa_states)
+    state_indices = {state: i for i, state in enumerate(dfa_states)}
+
+    # Dense transition table; missing or unknown targets go to a virtual sink n
+    sink = n
+    delta = []
+    for symbol in alphabet:
+        row = []
+        for state in dfa_states:
+            next_state = dfa_transitions.get((state, symbol), frozenset())
+            row.append(state_indices.get(next_state, sink))
+        row.append(sink)
+        delta.append(row)
+
+    accepting = {i for i, state in enumerate(dfa_states) if state in dfa_accepting}
+    keys = [_acceptance(state, dfa_accepting, tags) for state in dfa_states]
+    blocks = hopcroft_blocks(delta, keys)
+
+    # Minimal states ordered by their smallest DFA index, as table-filling yields
+    classes = sorted((block for block in blocks if sink not in block or len(block) > 1), key=min)
+    min_dfa_states = [frozenset(block - {sink}) for block in classes]
+    class_of = {}
+    for min_state in min_dfa_states:
+        for i in min_state:
+            class_of[i] = min_state
+
+    min_dfa_initial = class_of[0]  # dfa_states[0] is initial
+    min_dfa_accepting = {min_state for min_state in min_dfa_states if min(min_state) in accepting}
+
+    min_dfa_transitions = {}
+    for min_state in min_dfa_states:
+        rep_idx = min(min_state)
+        min_dfa_transitions[min_state] = {}
+        for a, symbol in enumerate(alphabet):
+            next_idx = delta[a][rep_idx]
+            min_dfa_transitions[min_state][symbol] = class_of.get(next_idx, frozenset())
+
+    return min_dfa_states, min_dfa_transitions, min_dfa_initial, min_dfa_accepting
+
 # Print the minimal DFA transition table
 def print_min_dfa_table(min_dfa_states, min_dfa_transitions, min_dfa_initial, min_dfa_accepting, alphabet):
     """Print the transition table for the minimal DFA."""
@@ -111,12 +243,34 @@ def print_min_dfa_table(min_dfa_states, min_dfa_transitions, min_dfa_initial, mi
             row += min_dfa_state_names.get(next_state, "{}") + "\t"
         print(row.rstrip())
 
-def validate_string(input_str, min_dfa_transitions, min_dfa_initial, min_dfa_accepting, alphabet):
+def validate_string(input_str, min_dfa_transitions, min_dfa_initial, min_dfa_accepting, alphabet, analysis=None):
     print("Test String : " + input_str)
+    if analysis is not None:
+        return _validate_with_analysis(input_str, min_dfa_transitions, min_dfa_initial, min_dfa_accepting,
+                                       alphabet, analysis)
     current_state = min_dfa_initial
     for char in input_str:
-        if char not in alphabet:
+        symbol = find_symbol(char, alphabet)
+        if symbol is None:
             return False  # Character not in the DFA's alphabet, so reject.
-        current_state = min_dfa_transitions[current_state].get(char, frozenset())
+        current_state = min_dfa_transitions[current_state].get(symbol, frozenset())
     return current_state in min_dfa_accepting
 
+def _validate_with_analysis(input_str, min_dfa_transitions, min_dfa_initial, min_dfa_accepting, alphabet, analysis):
+    """validate_string using a dfa_analysis.DFAAnalysis: stop at dead states, skip self-loop runs."""
+    current_state = min_dfa_initial
+    dead = analysis.dead
+    i = 0
+    while i < len(input_str):
+        if current_state in dead:
+            return False  # No accepting state is reachable any more
+        skipped = analysis.skip(current_state, input_str, i)
+        if skipped != i:
+            i = skipped
+            continue
+        symbol = find_symbol(input_str[i], alphabet)
+        if symbol is None:
+            return False
+        current_state = min_dfa_transitions[current_state].get(symbol, frozenset())
+        i += 1
+    return current_state in min_dfa_accepting
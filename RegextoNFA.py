@@ -1,9 +1,12 @@
+from array import array
 from collections import deque
 
+from charclass import CharClass, IntervalAlphabet, tokenize
+
 # Define the State class for the ε-NFA
 class State:
     def __init__(self, label=None):
-        self.label = label  # Character label, None for epsilon
+        self.label = label  # Character or CharClass label, None for epsilon
         self.edge1 = None   # First transition
         self.edge2 = None   # Second transition
 
@@ -13,28 +16,148 @@ class NFA:
         self.initial = initial
         self.accept = accept
 
+# Compact ε-NFA stored in parallel typed arrays indexed by dense state IDs
+class CompactNFA:
+    def __init__(self):
+        self.label = array('i')  # Code point of the character, -1 for epsilon, -2 - k for classes[k]
+        self.edge1 = array('i')  # First transition, -1 if none
+        self.edge2 = array('i')  # Second transition, -1 if none
+        self.classes = []        # CharClass labels referenced from self.label
+        self.class_ids = {}
+        self.initial = None
+        self.accept = None
+
+    def __len__(self):
+        return len(self.label)
+
+    def new_state(self, label=-1):
+        """Append a state and return its ID."""
+        self.label.append(label)
+        self.edge1.append(-1)
+        self.edge2.append(-1)
+        return len(self.label) - 1
+
+    def class_label(self, char_class):
+        """Label value referring to a CharClass, shared between equal classes."""
+        if char_class not in self.class_ids:
+            self.class_ids[char_class] = len(self.classes)
+            self.classes.append(char_class)
+        return -2 - self.class_ids[char_class]
+
+    def edge_labels(self):
+        """Distinct characters and CharClasses labelling the non-ε edges."""
+        labels = set(chr(label) for label in self.label if label >= 0)
+        labels.update(self.classes)
+        return labels
+
+    def sparse_transitions(self, intervals=None):
+        """Per-state transition dicts holding only the non-empty entries."""
+        if intervals is None:
+            intervals = IntervalAlphabet(self.edge_labels())
+        class_symbols = [intervals.symbols(char_class) for char_class in self.classes]
+        trans = []
+        for state_id in range(len(self.label)):
+            label, edge1, edge2 = self.label[state_id], self.edge1[state_id], self.edge2[state_id]
+            if label >= 0:
+                trans.append({chr(label): (edge1,)})
+            elif label <= -2:
+                trans.append({symbol: (edge1,) for symbol in class_symbols[-2 - label]})
+            elif edge2 >= 0:
+                trans.append({'ε': (edge1, edge2)})
+            elif edge1 >= 0:
+                trans.append({'ε': (edge1,)})
+            else:
+                trans.append({})
+        return trans
+
+    def transition_view(self):
+        """Return (trans, state_to_id, alphabet) in the shape build_dfa consumes.
+
+        States already have dense IDs, so state_to_id is the identity mapping
+        range(len(self)). Class labels are split into disjoint intervals.
+        """
+        intervals = IntervalAlphabet(self.edge_labels())
+        return self.sparse_transitions(intervals), range(len(self.label)), intervals.alphabet
+
+# Construct a compact ε-NFA from a postfix regular expression
+def compile_regex_compact(postfix):
+    """Thompson's construction emitting states straight into a CompactNFA."""
+    nfa = CompactNFA()
+    edge1, edge2 = nfa.edge1, nfa.edge2
+    stack = []
+    for c in postfix:
+        if c == '*':
+            initial1, accept1 = stack.pop()
+            initial = nfa.new_state()
+            accept = nfa.new_state()
+            edge1[initial], edge2[initial] = initial1, accept
+            edge1[accept1], edge2[accept1] = initial1, accept
+            stack.append((initial, accept))
+        elif c == '.':
+            initial2, accept2 = stack.pop()
+            initial1, accept1 = stack.pop()
+            edge1[accept1] = initial2
+            stack.append((initial1, accept2))
+        elif c == '|':
+            initial2, accept2 = stack.pop()
+            initial1, accept1 = stack.pop()
+            initial = nfa.new_state()
+            accept = nfa.new_state()
+            edge1[initial], edge2[initial] = initial1, initial2
+            edge1[accept1] = accept
+            edge1[accept2] = accept
+            stack.append((initial, accept))
+        elif c == '+':
+            initial1, accept1 = stack.pop()
+            initial = nfa.new_state()
+            accept = nfa.new_state()
+            edge1[initial] = initial1
+            edge1[accept1], edge2[accept1] = initial1, accept
+            stack.append((initial, accept))
+        elif c == '?':
+            initial1, accept1 = stack.pop()
+            initial = nfa.new_state()
+            accept = nfa.new_state()
+            edge1[initial], edge2[initial] = initial1, accept
+            edge1[accept1] = accept
+            stack.append((initial, accept))
+        else:  # Literal character or class
+            initial = nfa.new_state(nfa.class_label(c) if isinstance(c, CharClass) else ord(c))
+            accept = nfa.new_state()
+            edge1[initial] = accept
+            stack.append((initial, accept))
+    nfa.initial, nfa.accept = stack.pop()
+    return nfa
+
 # Convert infix regular expression to postfix notation
 def shunt(infix):
-    """Convert infix regular expression to postfix notation."""
+    """Convert infix regular expression to postfix notation.
+
+    Escapes (\\d, \\w, \\s, \\N, \\n, \\xHH, \\*, ...) and bracket classes
+    ([a-z], [^0-9]) become single CharClass tokens. The result is a string
+    when every token is a plain character, otherwise a tuple of tokens.
+    """
     specials = {'*': 60, '+': 55, '?': 50, '.': 40, '|': 20}
-    postfix = ''
+    postfix = []
     stack = []
-    for c in infix:
+    for c in tokenize(infix) if '\\' in infix or '[' in infix else infix:
         if c == '(':
             stack.append(c)
         elif c == ')':
             while stack and stack[-1] != '(':
-                postfix += stack.pop()
+                postfix.append(stack.pop())
             stack.pop()  # Remove '('
         elif c in specials:
             while stack and stack[-1] in specials and specials[c] <= specials[stack[-1]]:
-                postfix += stack.pop()
+                postfix.append(stack.pop())
             stack.append(c)
         else:
-            postfix += c
+            postfix.append(c)
     while stack:
-        postfix += stack.pop()
-    return postfix
+        postfix.append(stack.pop())
+    if any(isinstance(c, CharClass) for c in postfix):
+        return tuple(postfix)
+    return ''.join(postfix)
 
 # Construct an ε-NFA from a postfix regular expression
 def compileRegex(postfix):
@@ -81,7 +204,7 @@ def compileRegex(postfix):
             initial.edge2 = accept
             nfa1.accept.edge1 = accept
             nfaStack.append(NFA(initial, accept))
-        else:  # Literal character
+        else:  # Literal character or class
             initial = State(c)
             accept = State()
             initial.edge1 = accept
@@ -106,11 +229,12 @@ def get_nfa_state_ids(nfa):
     state_to_id = {state: i for i, state in enumerate(states)}
     return states, state_to_id
 
-# Print the ε-NFA transition table
-def print_nfa_table(nfa):
-    """Print the transition table for the ε-NFA."""
+# Build the ε-NFA transition table
+def build_nfa_table(nfa):
+    """Build the transition table for the ε-NFA without printing it."""
     states, state_to_id = get_nfa_state_ids(nfa)
-    alphabet = sorted(set(state.label for state in states if state.label is not None))
+    intervals = IntervalAlphabet(state.label for state in states if state.label is not None)
+    alphabet = intervals.alphabet
     trans = {state_id: {symbol: set() for symbol in alphabet + ['ε']} for state_id in range(len(states))}
     
     # Build transition dictionary
@@ -118,26 +242,37 @@ def print_nfa_table(nfa):
         state_id = state_to_id[state]
         if state.label is not None:
             if state.edge1 is not None:
-                trans[state_id][state.label].add(state_to_id[state.edge1])
+                for symbol in intervals.symbols(state.label):
+                    trans[state_id][symbol].add(state_to_id[state.edge1])
         else:
             if state.edge1 is not None:
                 trans[state_id]['ε'].add(state_to_id[state.edge1])
             if state.edge2 is not None:
                 trans[state_id]['ε'].add(state_to_id[state.edge2])
-    
-    # Print the table
+    return trans, state_to_id, alphabet
+
+# Print an already built ε-NFA transition table
+def print_nfa_transitions(nfa, trans, state_to_id, alphabet):
+    """Print the transition table returned by build_nfa_table."""
+    initial_id = state_to_id[nfa.initial]
+    accept_id = state_to_id[nfa.accept]
     print("ε-NFA Transition Table:")
     header = "State\t" + "\t".join(alphabet) + "\tε"
     print(header)
-    for state_id in range(len(states)):
-        is_initial = " (initial)" if states[state_id] == nfa.initial else ""
-        is_accept = " (accept)" if states[state_id] == nfa.accept else ""
+    for state_id in range(len(trans)):
+        is_initial = " (initial)" if state_id == initial_id else ""
+        is_accept = " (accept)" if state_id == accept_id else ""
         row = f"{state_id}{is_initial}{is_accept}\t"
         for symbol in alphabet:
-            next_states = trans[state_id][symbol]
+            next_states = trans[state_id].get(symbol, ())
             row += "{" + ",".join(map(str, sorted(next_states))) + "}\t"
-        epsilon_next = trans[state_id]['ε']
+        epsilon_next = trans[state_id].get('ε', ())
         row += "{" + ",".join(map(str, sorted(epsilon_next))) + "}"
         print(row)
-    return trans, state_to_id, alphabet
 
+# Print the ε-NFA transition table
+def print_nfa_table(nfa):
+    """Build and print the transition table for the ε-NFA."""
+    trans, state_to_id, alphabet = build_nfa_table(nfa)
+    print_nfa_transitions(nfa, trans, state_to_id, alphabet)
+    return trans, state_to_id, alphabet
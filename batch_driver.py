@@ -0,0 +1,173 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import RegextoNFA
+import DFAtoMINDFA
+import nfatodfa
+from dfa_analysis import DFAAnalysis
+from dot_export import write_dense_dot
+from pipeline import run_pipeline
+from test_generation import generate_assembly
+
+# Read (pattern, test strings) jobs from a JSONL manifest
+def read_manifest(path):
+    """Return a list of job dicts with unique, filesystem-safe ids.
+
+    Each manifest line is an object with a "pattern", an optional list of
+    "tests" and an optional "id"; blank lines are skipped. Characters other
+    than letters, digits, '_', '.' and '-' in an id become '_'. Raises
+    ValueError for an id made only of dots (it would name the output
+    directory or its parent) and for ids that are equal after this rewrite.
+    """
+    jobs = []
+    seen = set()
+    with open(path) as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            job_id = re.sub(r"[^A-Za-z0-9_.-]", "_", str(entry.get("id", f"job{line_number:05d}")))
+            if not job_id.strip("."):
+                raise ValueError(f"{path}:{line_number}: job id {entry.get('id')!r} is not a usable directory name")
+            if job_id in seen:
+                raise ValueError(f"{path}:{line_number}: duplicate job id {job_id!r}")
+            seen.add(job_id)
+            jobs.append({"id": job_id, "pattern": entry["pattern"], "tests": list(entry.get("tests", []))})
+    return jobs
+
+# Compile one pattern and write its artifacts into its own directory
+def run_job(job, out_dir, write_tables=True):
+    """Run one job; returns a result dict and never raises."""
+    start = time.perf_counter()
+    job_dir = os.path.join(out_dir, job["id"])
+    try:
+        root = os.path.realpath(out_dir)
+        if os.path.dirname(os.path.realpath(job_dir)) != root:
+            raise ValueError(f"Job directory {job_dir!r} is not directly inside {out_dir!r}")
+        os.makedirs(job_dir, exist_ok=True)
+        result = run_pipeline(job["pattern"])
+        min_dfa_states, min_dfa_transitions, min_dfa_initial, min_dfa_accepting = result.min_dfa
+        alphabet = result.alphabet
+
+        log = io.StringIO()
+        with contextlib.redirect_stdout(log):
+            print(f"Processing regular expression: {job['pattern']}\n")
+            if write_tables:
+                RegextoNFA.print_nfa_transitions(result.nfa, result.trans, result.state_to_id, alphabet)
+                nfatodfa.print_dfa_table(*result.dfa, alphabet)
+                DFAtoMINDFA.print_min_dfa_table(*result.min_dfa, alphabet)
+            analysis = DFAAnalysis(min_dfa_states, min_dfa_transitions, min_dfa_accepting, alphabet)
+            accepted = []
+            print("\nValidation results:")
+            for test_string in job["tests"]:
+                accepted.append(DFAtoMINDFA.validate_string(
+                    test_string, min_dfa_transitions, min_dfa_initial, min_dfa_accepting, alphabet, analysis=analysis))
+                print(accepted[-1])
+        with open(os.path.join(job_dir, "output.txt"), "w") as f:
+            f.write(log.getvalue())
+
+        for k, test_string in enumerate(job["tests"], 1):
+            asm_code = generate_assembly(result.dense, test_string)
+            with open(os.path.join(job_dir, f"regex_{k}.asm"), "w") as f:
+                f.write(asm_code)
+
+        with open(os.path.join(job_dir, "graph.dot"), "w") as f:
+            write_dense_dot(f, result.dense)
+        return {"id": job["id"], "ok": True, "accepted": accepted, "min_dfa_states": len(min_dfa_states),
+                "seconds": time.perf_counter() - start}
+    except Exception as e:
+        return {"id": job["id"], "ok": False, "error": f"{type(e).__name__}: {e}",
+                "seconds": time.perf_counter() - start}
+
+# Give every run its own output directory so overlapping runs never share job directories
+OUTPUT_ROOT = "batch_outputs"
+RUN_MARKER = ".batch_run"  # Created in an output directory by the run that owns it
+
+def new_out_dir(root=OUTPUT_ROOT):
+    """Create and return a fresh directory under root, named after the start time."""
+    os.makedirs(root, exist_ok=True)
+    return tempfile.mkdtemp(prefix=time.strftime("run-%Y%m%d-%H%M%S-"), dir=root)
+
+def claim_out_dir(out_dir, force=False):
+    """Create out_dir and mark it as owned by this run.
+
+    Raises FileExistsError if out_dir already holds files from another run,
+    unless force is set. The marker is created with O_EXCL, so of two runs
+    starting on the same empty directory only one gets it.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    if not force and os.listdir(out_dir):
+        raise FileExistsError(f"Output directory {out_dir!r} is not empty; pass --force to write into it anyway")
+    flags = os.O_CREAT | os.O_WRONLY | os.O_TRUNC | (0 if force else os.O_EXCL)
+    with os.fdopen(os.open(os.path.join(out_dir, RUN_MARKER), flags), "w") as f:
+        f.write(f"{os.getpid()}\n")
+
+def _run_job_args(args):
+    return run_job(*args)
+
+# Run all jobs in a process pool
+def run_batch(jobs, out_dir, workers=None, write_tables=True, chunksize=4):
+    """Compile every job in parallel; returns (results, elapsed seconds)."""
+    os.makedirs(out_dir, exist_ok=True)
+    start = time.perf_counter()
+    tasks = [(job, out_dir, write_tables) for job in jobs]
+    if workers == 1:
+        results = [_run_job_args(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_run_job_args, tasks, chunksize=chunksize))
+    return results, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile a manifest of regular expressions in parallel.")
+    parser.add_argument("manifest", help="JSONL file of {\"id\", \"pattern\", \"tests\"} objects")
+    parser.add_argument("--out-dir", help=f"directory for per-job outputs (default: a new run-* directory under "
+                                          f"{OUTPUT_ROOT}/); must be empty unless --force is given")
+    parser.add_argument("--force", action="store_true", help="write into a non-empty --out-dir")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--no-tables", action="store_true", help="skip writing the transition tables")
+    args = parser.parse_args()
+
+    try:
+        jobs = read_manifest(args.manifest)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    if args.out_dir is None:
+        args.out_dir = new_out_dir()
+    try:
+        claim_out_dir(args.out_dir, force=args.force)
+    except FileExistsError as e:
+        print(e, file=sys.stderr)
+        return 2
+    results, elapsed = run_batch(jobs, args.out_dir, workers=args.workers, write_tables=not args.no_tables)
+    failures = [r for r in results if not r["ok"]]
+    summary = {
+        "jobs": len(results),
+        "succeeded": len(results) - len(failures),
+        "failed": len(failures),
+        "elapsed_s": elapsed,
+        "jobs_per_s": len(results) / elapsed if elapsed else None,
+        "results": results,
+    }
+    with open(os.path.join(args.out_dir, "summary.json"), "w") as f:
+        json.dump(summary, f, indent=2)
+
+    print(f"{summary['succeeded']}/{summary['jobs']} jobs succeeded in {elapsed:.2f}s "
+          f"({summary['jobs_per_s'] or 0:.1f} jobs/s)")
+    print(f"Outputs written to: {args.out_dir}")
+    for failure in failures:
+        print(f"FAILED {failure['id']}: {failure['error']}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+try:
+    import numpy as np
+except ImportError:  # NumPy is only needed for batch validation
+    np = None
+
+from charclass import symbol_range
+from dense_dfa import NO_STATE
+
+# Largest code point covered by the direct lookup table; wider alphabets use bisection
+LOOKUP_LIMIT = 0xFFFF
+
+# Vectorized validation of many strings against a minimal DFA
+class BatchValidator:
+    """Match arrays of strings against a minimal dense_dfa.DenseDFA with NumPy indexing.
+
+    The DFA is turned into a dense (states + 1) x (symbols + 1) integer
+    matrix. The extra row is a reject sink and the extra column catches
+    every character outside the alphabet, which sends a string to the sink.
+    All strings advance together, one position per step.
+    """
+    def __init__(self, dense):
+        if np is None:
+            raise ImportError("BatchValidator requires NumPy")
+        symbols = dense.alphabet
+        self.sink = dense.num_states
+        self.invalid_column = len(symbols)
+        ranges = np.array([symbol_range(symbol) for symbol in symbols], dtype=np.uint32).reshape(-1, 2)
+        self.firsts, self.lasts = ranges[:, 0], ranges[:, 1]
+
+        # Direct code point -> column lookup; the last slot catches everything above
+        limit = int(self.lasts[-1]) + 1 if len(symbols) else 0
+        self.lookup = None
+        if limit <= LOOKUP_LIMIT + 1:
+            self.lookup = np.full(limit + 1, self.invalid_column, dtype=np.intp)
+            for column, (first, last) in enumerate(ranges):
+                self.lookup[first:last + 1] = column
+
+        # The DenseDFA table already has this layout; missing transitions go to the sink
+        matrix = np.full((self.sink + 1, len(symbols) + 1), self.sink, dtype=np.int32)
+        table = np.frombuffer(dense.table, dtype=np.uint32).reshape(self.sink, len(symbols))
+        matrix[:self.sink, :len(symbols)] = np.where(table == NO_STATE, self.sink, table)
+        self.matrix = matrix
+        self.initial = dense.initial
+        self.accepting = np.zeros(self.sink + 1, dtype=bool)
+        self.accepting[:self.sink] = [dense.is_accepting(state) for state in range(self.sink)]
+
+    def columns(self, codes):
+        """Map an array of code points to matrix columns."""
+        if self.lookup is not None:
+            return self.lookup[np.minimum(codes, len(self.lookup) - 1)]
+        columns = np.searchsorted(self.firsts, codes, side='right') - 1
+        inside = (columns >= 0) & (codes <= self.lasts[np.maximum(columns, 0)])
+        return np.where(inside, columns, self.invalid_column)
+
+    def _encode(self, strings):
+        """Return (columns, offsets, lengths) for a list or array of strings."""
+        if isinstance(strings, np.ndarray) and strings.dtype.kind == 'U':
+            strings = np.ascontiguousarray(strings.ravel())
+            width = strings.dtype.itemsize // 4
+            codes = strings.view(np.uint32)
+            lengths = np.char.str_len(strings).astype(np.intp)
+            offsets = np.arange(len(strings), dtype=np.intp) * width
+        else:
+            strings = list(strings)
+            lengths = np.fromiter(map(len, strings), dtype=np.intp, count=len(strings))
+            joined = ''.join(strings).encode('utf-32-le', 'surrogatepass')
+            codes = np.frombuffer(joined, dtype='<u4')
+            offsets = np.zeros(len(strings), dtype=np.intp)
+            np.cumsum(lengths[:-1], out=offsets[1:])
+        return self.columns(codes), offsets, lengths
+
+    def validate(self, strings):
+        """Return a boolean array telling which strings the DFA accepts."""
+        columns, offsets, lengths = self._encode(strings)
+        count = len(lengths)
+        if count == 0:
+            return np.zeros(0, dtype=bool)
+
+        # Longest strings first, so the active strings at step p are a prefix
+        order = np.argsort(-lengths, kind='stable')
+        offsets = offsets[order]
+        descending = -lengths[order]
+        states = np.full(count, self.initial, dtype=np.int32)
+        for p in range(int(-descending[0])):
+            active = np.searchsorted(descending, -p, side='left')
+            states[:active] = self.matrix[states[:active], columns[offsets[:active] + p]]
+
+        result = np.empty(count, dtype=bool)
+        result[order] = self.accepting[states]
+        return result
+
+# Validate a batch of strings against a minimal DFA
+def validate_batch(strings, dense):
+    """Validate many strings at once against a DenseDFA; returns a NumPy boolean array."""
+    return BatchValidator(dense).validate(strings)
@@ -0,0 +1,262 @@
+import argparse
+import json
+import math
+import platform
+import string
+import sys
+import time
+
+import RegextoNFA
+import nfatodfa
+import DFAtoMINDFA
+import compiled_regex
+import followpos
+import regex_ast
+from dense_dfa import DenseDFA
+from test_generation import generate_assembly
+
+# Single-byte symbols that are never regex operators (generate_assembly indexes by byte)
+SYMBOLS = string.ascii_lowercase + string.ascii_uppercase + string.digits + "".join(map(chr, range(0xC0, 0x100)))
+
+def symbol(i):
+    """Return the i-th distinct literal symbol."""
+    if i >= len(SYMBOLS):
+        raise ValueError(f"Only {len(SYMBOLS)} distinct symbols are available")
+    return SYMBOLS[i]
+
+# Parameterized pattern families
+def concat_family(n):
+    """a.b.c... with n literals."""
+    return ".".join(symbol(i % 26) for i in range(n))
+
+def alternation_family(n):
+    """(a|b|c|...) with n distinct literals."""
+    return "(" + "|".join(symbol(i) for i in range(n)) + ")"
+
+def nested_star_family(n):
+    """((a*.b)*.c)*... nested n levels deep."""
+    pattern = symbol(0) + "*"
+    for i in range(1, n):
+        pattern = f"({pattern}.{symbol(i)})*"
+    return pattern
+
+def exponential_family(n):
+    """(a|b)*.a.(a|b)^n, whose minimal DFA has 2^(n+1) states."""
+    return "(a|b)*.a" + ".(a|b)" * n
+
+FAMILIES = {
+    "concat": (concat_family, [8, 32, 128, 512]),
+    "alternation": (alternation_family, [4, 16, 64, 126]),
+    "nested_star": (nested_star_family, [2, 4, 8, 16]),
+    "exponential": (exponential_family, [2, 4, 6, 8, 10]),
+}
+
+def _timed(func, *args, **kwargs):
+    """Call func and return (result, elapsed seconds)."""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+# Time every pipeline stage for one pattern
+def bench_pattern(pattern, repeat=3, nfa_builder="thompson", engine="bitset", minimize_method="hopcroft",
+                  construction="nfa", simplify=False):
+    """Return the best-of-repeat time of each stage plus the sizes produced.
+
+    With construction='followpos' the ε-NFA stages are replaced by the
+    position tables, and 'intermediate_states' counts positions instead
+    of NFA states. simplify replaces shunt with regex_ast's parse and
+    rewrite pass; the sizes then include the tree size before and after.
+    """
+    best = {}
+    for _ in range(repeat):
+        times = {}
+        if simplify:
+            (postfix, tree_before, tree_after), times["simplify"] = _timed(regex_ast.simplified_postfix, pattern)
+        else:
+            postfix, times["shunt"] = _timed(RegextoNFA.shunt, pattern)
+        if construction == "followpos":
+            tables, times["positions"] = _timed(followpos.PositionTables, postfix)
+            (dfa, alphabet), times["build_dfa"] = _timed(followpos.build_dfa_followpos, postfix, tables)
+            intermediate_states = len(tables.follow)
+        else:
+            if nfa_builder == "compact":
+                nfa, times["compileRegex"] = _timed(RegextoNFA.compile_regex_compact, postfix)
+                (trans, state_to_id, alphabet), times["nfa_table"] = _timed(nfa.transition_view)
+            else:
+                nfa, times["compileRegex"] = _timed(RegextoNFA.compileRegex, postfix)
+                (trans, state_to_id, alphabet), times["nfa_table"] = _timed(RegextoNFA.build_nfa_table, nfa)
+            dfa, times["build_dfa"] = _timed(nfatodfa.build_dfa, nfa, trans, state_to_id, alphabet, engine=engine)
+            intermediate_states = len(trans)
+        dfa_states, dfa_transitions, dfa_initial, dfa_accepting = dfa
+        min_dfa, times["minimize_dfa"] = _timed(
+            DFAtoMINDFA.minimize_dfa, dfa_states, dfa_transitions, dfa_accepting, alphabet, method=minimize_method
+        )
+        _, times["generate_assembly"] = _timed(generate_assembly, *min_dfa, alphabet, "")
+        for stage, elapsed in times.items():
+            best[stage] = min(elapsed, best.get(stage, elapsed))
+    sizes = {
+        "postfix_length": len(postfix),
+        "alphabet_size": len(alphabet),
+        "intermediate_states": intermediate_states,
+        "dfa_states": len(dfa_states),
+        "min_dfa_states": len(min_dfa[0]),
+    }
+    if simplify:
+        sizes["tree_size_before"] = tree_before
+        sizes["tree_size_after"] = tree_after
+    return {"times_s": best, "total_s": sum(best.values()), "sizes": sizes}
+
+# Scaling checks: chain DFAs are the worst case for block splitting
+SCALING_SIZES = [8000, 16000, 32000, 64000]
+MAX_SCALING_RATIO = 3.0  # Allowed slowdown per doubling of n; n·log n stays near 2, a quadratic split reaches 4-5
+
+def chain_delta(n):
+    """hopcroft_blocks input for a chain of n states on one symbol; only the last state accepts.
+
+    Every state ends up in its own block, so the refinement performs n splits.
+    """
+    return [list(range(1, n)) + [n, n]], [None] * (n - 1) + [True]
+
+def chain_dense(n):
+    """The same chain as a DenseDFA, as minimized by the followpos pipeline."""
+    return DenseDFA.build(["a"], [[i + 1] for i in range(n - 1)] + [[None]], 0, [n - 1])
+
+# a|a*.b on a^n: each start has a one-character match, yet a*.b keeps every anchored run alive to the end
+SEARCH_SCALING_PATTERN = "a|(a*.b)"
+
+def count_matches(pattern, text):
+    """Number of leftmost-longest matches of pattern in text (the pattern is compiled through the cache)."""
+    return sum(1 for _ in compiled_regex.compile(pattern).finditer(text))
+
+def check_scaling(sizes=SCALING_SIZES, repeat=3):
+    """Time the minimizers and the searcher at growing sizes n; returns (records, ok).
+
+    Wall-clock ratios are noisy on shared machines, so testing.sh only
+    reports this check as advisory.
+
+    hopcroft_blocks and DenseDFA.minimize run on n-state chain DFAs, and
+    Searcher.finditer on SEARCH_SCALING_PATTERN over n characters. ok is
+    False if any of them grows by more than MAX_SCALING_RATIO per doubling
+    of n on average, i.e. scales worse than n·log n.
+    """
+    records = []
+    ok = True
+    doublings = math.log2(sizes[-1] / sizes[0])
+    checks = {
+        "hopcroft_blocks": lambda n: (DFAtoMINDFA.hopcroft_blocks, *chain_delta(n)),
+        "dense_minimize": lambda n: (chain_dense(n).minimize,),
+        "finditer": lambda n: (count_matches, SEARCH_SCALING_PATTERN, "a" * n),
+    }
+    for check, setup in checks.items():
+        times = []
+        for n in sizes:
+            func, *args = setup(n)
+            best = min(_timed(func, *args)[1] for _ in range(repeat))
+            times.append(best)
+            records.append({"check": check, "n": n, "seconds": best})
+            print(f"{check:15} n={n:<6} {best:.4f}s", file=sys.stderr)
+        ok = ok and (times[-1] / max(times[0], 1e-9)) ** (1 / doublings) <= MAX_SCALING_RATIO
+    return records, ok
+
+# Deterministic work counters of the subset construction, checked against size bounds
+def check_counts(families=FAMILIES, max_size=64):
+    """Build every family's DFA through ClosureTables and check its counters; returns (records, ok).
+
+    Unlike check_scaling this does not depend on timing. Each DFA state
+    must be interned as new exactly once, every transition must be looked
+    up exactly once, and move() may not union more step entries than
+    dfa_states x step_entries.
+    """
+    records = []
+    ok = True
+    for name in families:
+        family, sizes = FAMILIES[name]
+        for n in sizes:
+            if n > max_size:
+                continue
+            nfa = RegextoNFA.compile_regex_compact(RegextoNFA.shunt(family(n)))
+            trans, _, alphabet = nfa.transition_view()
+            tables = nfatodfa.ClosureTables(trans, alphabet)
+            masks, _ = nfatodfa.build_dfa_bitset(nfa.initial, trans, alphabet, tables)
+            stats = tables.stats()
+            bounds = {
+                "intern_misses": (stats["intern_misses"], len(masks) - 1),
+                "lookups": (stats["intern_hits"] + stats["intern_misses"], len(masks) * len(alphabet)),
+                "step_unions": (stats["step_unions"], len(masks) * stats["step_entries"]),
+            }
+            passed = (bounds["intern_misses"][0] == bounds["intern_misses"][1]
+                      and bounds["lookups"][0] == bounds["lookups"][1]
+                      and bounds["step_unions"][0] <= bounds["step_unions"][1])
+            ok = ok and passed
+            records.append({"family": name, "n": n, "counts": bounds, "ok": passed})
+            if not passed:
+                print(f"{name:12} n={n:<5} counters out of bounds: {bounds}", file=sys.stderr)
+    return records, ok
+
+# Run the selected families across their sizes
+def run_suite(families, sizes=None, repeat=3, max_size=None, **config):
+    """Benchmark each family at growing sizes; returns a list of result records."""
+    results = []
+    for name in families:
+        family, default_sizes = FAMILIES[name]
+        for n in sizes or default_sizes:
+            if max_size is not None and n > max_size:
+                continue
+            pattern = family(n)
+            record = {"family": name, "n": n, "pattern_length": len(pattern)}
+            record.update(bench_pattern(pattern, repeat=repeat, **config))
+            results.append(record)
+            print(f"{name:12} n={n:<5} total={record['total_s']:.4f}s "
+                  f"min_dfa_states={record['sizes']['min_dfa_states']}", file=sys.stderr)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the regex -> minimal DFA -> assembly pipeline.")
+    parser.add_argument("--families", nargs="+", default=list(FAMILIES), choices=list(FAMILIES))
+    parser.add_argument("--sizes", type=int, nargs="+", help="override the default sizes of every family")
+    parser.add_argument("--max-size", type=int, help="skip sizes above this value")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per pattern; the best time is kept")
+    parser.add_argument("--construction", choices=["nfa", "followpos"], default="nfa",
+                        help="ε-NFA + subset construction, or the direct followpos construction")
+    parser.add_argument("--simplify", action="store_true", help="simplify the expression tree before construction")
+    parser.add_argument("--nfa-builder", choices=["thompson", "compact"], default="thompson")
+    parser.add_argument("--engine", choices=["bitset", "sets"], default="bitset")
+    parser.add_argument("--minimize", choices=["hopcroft", "table"], default="hopcroft")
+    parser.add_argument("--output", default="bench_results.json", help="JSON results file ('-' for stdout)")
+    parser.add_argument("--check-counts", action="store_true",
+                        help="only check the subset construction's work counters against size bounds; exit 1 on failure")
+    parser.add_argument("--check-scaling", action="store_true",
+                        help="only time the minimizers and the searcher at growing sizes; exit 1 if one scales "
+                             "super-linearithmically")
+    args = parser.parse_args()
+
+    if args.check_counts:
+        records, ok = check_counts()
+        print(f"Work counters {'ok' if ok else 'FAILED'} ({len(records)} DFAs checked)", file=sys.stderr)
+        sys.exit(0 if ok else 1)
+    if args.check_scaling:
+        _, ok = check_scaling(repeat=args.repeat)
+        print("Scaling " + ("ok" if ok else "FAILED: time grows too fast with n"), file=sys.stderr)
+        sys.exit(0 if ok else 1)
+
+    config = {"construction": args.construction, "simplify": args.simplify, "nfa_builder": args.nfa_builder,
+              "engine": args.engine, "minimize_method": args.minimize}
+    results = run_suite(args.families, sizes=args.sizes, repeat=args.repeat, max_size=args.max_size, **config)
+    document = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": config,
+        "repeat": args.repeat,
+        "results": results,
+    }
+    text = json.dumps(document, indent=2)
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, "w") as f:
+            f.write(text)
+        print(f"Benchmark results saved to: {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
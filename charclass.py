@@ -0,0 +1,271 @@
+from bisect import bisect_left, bisect_right
+
+MAX_CODEPOINT = 0x10FFFF
+
+# Characters that are regex operators when they appear unescaped
+OPERATOR_CHARS = set("*+?.|()[]\\")
+
+def _normalize(ranges):
+    """Sort (first, last) ranges and merge overlapping or adjacent ones."""
+    merged = []
+    for first, last in sorted(ranges):
+        if merged and first <= merged[-1][1] + 1:
+            if last > merged[-1][1]:
+                merged[-1] = (merged[-1][0], last)
+        else:
+            merged.append((first, last))
+    return tuple(merged)
+
+def char_label(code):
+    """Printable form of one code point inside a class or symbol label."""
+    char = chr(code)
+    if char in "\\]-^[":
+        return "\\" + char
+    if char.isprintable() and char != " ":
+        return char
+    if code <= 0xFF:
+        return f"\\x{code:02x}"
+    if code <= 0xFFFF:
+        return f"\\u{code:04x}"
+    return f"\\U{code:08x}"
+
+# A set of code points, used as the label of one NFA edge
+class CharClass:
+    """Set of characters stored as sorted, disjoint (first, last) code point ranges."""
+    __slots__ = ("ranges",)
+
+    def __init__(self, ranges):
+        self.ranges = _normalize(ranges)
+
+    @classmethod
+    def of(cls, chars):
+        """Class containing exactly the given characters."""
+        return cls((ord(c), ord(c)) for c in chars)
+
+    def negate(self):
+        """Complement within [0, MAX_CODEPOINT]."""
+        ranges = []
+        start = 0
+        for first, last in self.ranges:
+            if first > start:
+                ranges.append((start, first - 1))
+            start = last + 1
+        if start <= MAX_CODEPOINT:
+            ranges.append((start, MAX_CODEPOINT))
+        return CharClass(ranges)
+
+    def __contains__(self, char):
+        code = ord(char)
+        k = bisect_right(self.ranges, (code, MAX_CODEPOINT + 1)) - 1
+        return k >= 0 and code <= self.ranges[k][1]
+
+    def __eq__(self, other):
+        if not isinstance(other, CharClass):
+            return NotImplemented
+        return self.ranges == other.ranges
+
+    def __hash__(self):
+        return hash(self.ranges)
+
+    def __repr__(self):
+        parts = []
+        for first, last in self.ranges:
+            if first == last:
+                parts.append(char_label(first))
+            else:
+                parts.append(f"{char_label(first)}-{char_label(last)}")
+        return "[" + "".join(parts) + "]"
+
+# Shorthand escapes
+DIGITS = CharClass([(ord("0"), ord("9"))])
+WORD = CharClass([(ord("0"), ord("9")), (ord("A"), ord("Z")), (ord("_"), ord("_")), (ord("a"), ord("z"))])
+SPACE = CharClass.of(" \t\n\r\f\v")
+WILDCARD = CharClass.of("\n").negate()  # \N: any character except newline
+SHORTHANDS = {
+    "d": DIGITS, "D": DIGITS.negate(),
+    "w": WORD, "W": WORD.negate(),
+    "s": SPACE, "S": SPACE.negate(),
+    "N": WILDCARD,
+}
+CONTROL_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "f": "\f", "v": "\v", "0": "\0"}
+
+# Alphabet symbol covering a run of code points
+class SymbolRange(str):
+    """Alphabet symbol standing for every code point from first to last.
+
+    It is a str (its label, e.g. "[a-z]") so tables, dict keys and printing
+    keep working; single code points are plain one-character strings instead.
+    """
+    def __new__(cls, first, last):
+        symbol = super().__new__(cls, f"[{char_label(first)}-{char_label(last)}]")
+        symbol.first = first
+        symbol.last = last
+        return symbol
+
+    def __reduce__(self):
+        return SymbolRange, (self.first, self.last)
+
+def make_symbol(first, last):
+    """Alphabet symbol for [first, last]: a plain character when it is a single one."""
+    if first == last:
+        return chr(first)
+    return SymbolRange(first, last)
+
+def symbol_range(symbol):
+    """(first, last) code points covered by an alphabet symbol."""
+    if isinstance(symbol, SymbolRange):
+        return symbol.first, symbol.last
+    return ord(symbol), ord(symbol)
+
+def label_ranges(label):
+    """Code point ranges of an NFA edge label (a character or a CharClass)."""
+    if isinstance(label, CharClass):
+        return label.ranges
+    return ((ord(label), ord(label)),)
+
+# Split overlapping edge labels into disjoint alphabet symbols
+class IntervalAlphabet:
+    """Disjoint alphabet intervals derived from a set of NFA edge labels.
+
+    Every label is exactly a union of the resulting symbols, so subset
+    construction can work on the symbols alone. With only plain character
+    labels the alphabet is the sorted set of those characters.
+    """
+    def __init__(self, labels):
+        ranges = [r for label in set(labels) for r in label_ranges(label)]
+        union = _normalize(ranges)
+        points = sorted({first for first, _ in ranges} | {last + 1 for _, last in ranges})
+        union_starts = [first for first, _ in union]
+        self.intervals = []
+        for start, end in zip(points, points[1:]):
+            k = bisect_right(union_starts, start) - 1
+            if k >= 0 and start <= union[k][1]:
+                self.intervals.append((start, end - 1))
+        self.starts = [first for first, _ in self.intervals]
+        self.alphabet = [make_symbol(first, last) for first, last in self.intervals]
+
+    def symbols(self, label):
+        """Alphabet symbols whose union is the label."""
+        result = []
+        for first, last in label_ranges(label):
+            k = bisect_left(self.starts, first)
+            while k < len(self.intervals) and self.intervals[k][0] <= last:
+                result.append(self.alphabet[k])
+                k += 1
+        return result
+
+# Map input characters to the alphabet symbol containing them
+class SymbolIndex:
+    """Character -> alphabet symbol lookup: a dict for single characters, bisection for ranges."""
+    def __init__(self, alphabet):
+        self.singles = {}
+        ranges = []
+        for symbol in alphabet:
+            if isinstance(symbol, SymbolRange):
+                ranges.append((symbol.first, symbol.last, symbol))
+            else:
+                self.singles[symbol] = symbol
+        ranges.sort()
+        self.firsts = [first for first, _, _ in ranges]
+        self.ranges = ranges
+
+    def lookup(self, char):
+        """Return the symbol containing char, or None if it is outside the alphabet."""
+        symbol = self.singles.get(char)
+        if symbol is not None or not self.ranges:
+            return symbol
+        code = ord(char)
+        k = bisect_right(self.firsts, code) - 1
+        if k >= 0 and code <= self.ranges[k][1]:
+            return self.ranges[k][2]
+        return None
+
+def find_symbol(char, alphabet):
+    """Linear lookup of the symbol containing char (for one-off matching)."""
+    if char in alphabet:
+        return char
+    code = ord(char)
+    for symbol in alphabet:
+        if isinstance(symbol, SymbolRange) and symbol.first <= code <= symbol.last:
+            return symbol
+    return None
+
+# Tokenizer support for escapes and bracket expressions
+def literal_token(char):
+    """Token for a literal character: the character itself unless it is an operator."""
+    if char in OPERATOR_CHARS:
+        return CharClass.of(char)
+    return char
+
+def parse_escape(pattern, i):
+    """Parse the escape whose letter is at pattern[i]; returns (token, next index)."""
+    if i >= len(pattern):
+        raise ValueError("Pattern ends with a dangling backslash")
+    c = pattern[i]
+    if c in SHORTHANDS:
+        return SHORTHANDS[c], i + 1
+    if c in CONTROL_ESCAPES:
+        return literal_token(CONTROL_ESCAPES[c]), i + 1
+    if c == "x":
+        digits = pattern[i + 1:i + 3]
+        if len(digits) != 2 or any(d not in "0123456789abcdefABCDEF" for d in digits):
+            raise ValueError(f"Invalid \\x escape at position {i - 1}")
+        return literal_token(chr(int(digits, 16))), i + 3
+    return literal_token(c), i + 1
+
+def _class_item(pattern, i):
+    """Parse one bracket item; returns (CharClass or single character, next index)."""
+    c = pattern[i]
+    if c == "\\":
+        token, i = parse_escape(pattern, i + 1)
+        if isinstance(token, CharClass) and len(token.ranges) == 1 and token.ranges[0][0] == token.ranges[0][1]:
+            token = chr(token.ranges[0][0])
+        return token, i
+    return c, i + 1
+
+def parse_class(pattern, i):
+    """Parse a bracket expression whose body starts at pattern[i]; returns (token, next index)."""
+    negated = i < len(pattern) and pattern[i] == "^"
+    if negated:
+        i += 1
+    ranges = []
+    first_item = True
+    while True:
+        if i >= len(pattern):
+            raise ValueError("Unterminated character class")
+        if pattern[i] == "]" and not first_item:
+            i += 1
+            break
+        first_item = False
+        item, i = _class_item(pattern, i)
+        if isinstance(item, CharClass):
+            ranges.extend(item.ranges)
+            continue
+        if i + 1 < len(pattern) and pattern[i] == "-" and pattern[i + 1] != "]":
+            upper, i = _class_item(pattern, i + 1)
+            if isinstance(upper, CharClass) or ord(upper) < ord(item):
+                raise ValueError(f"Invalid range {item}-{upper} in character class")
+            ranges.append((ord(item), ord(upper)))
+        else:
+            ranges.append((ord(item), ord(item)))
+    token = CharClass(ranges)
+    if negated:
+        token = token.negate()
+    if len(token.ranges) == 1 and token.ranges[0][0] == token.ranges[0][1]:
+        return literal_token(chr(token.ranges[0][0])), i
+    return token, i
+
+def tokenize(pattern):
+    """Split an infix pattern into operator characters, literal characters and CharClass tokens."""
+    tokens = []
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\":
+            token, i = parse_escape(pattern, i + 1)
+        elif c == "[":
+            token, i = parse_class(pattern, i + 1)
+        else:
+            token, i = c, i + 1
+        tokens.append(token)
+    return tokens
@@ -0,0 +1,200 @@
+import threading
+from collections import OrderedDict
+
+import RegextoNFA
+import batch_validate
+from dense_dfa import DenseDFA
+from dfa_analysis import DFAAnalysis
+from prefilter import build_prefilter
+from pygen import compile_matcher
+from search import Searcher
+from pipeline import run_pipeline
+
+# Immutable compiled pattern wrapping a minimal DFA
+class CompiledPattern:
+    """A regular expression compiled to its minimal DFA.
+
+    Instances are immutable and safe to share between threads: the
+    matchers, batch validator, searcher and analysis are built on first
+    use under a per-instance lock. Full matches run a Python function
+    generated for this automaton (see pygen).
+    """
+    __slots__ = ("pattern", "postfix", "alphabet", "min_dfa", "dense", "_batch", "_searcher", "_matchers",
+                 "prefilter", "_analysis", "_lock")
+
+    def __init__(self, pattern, postfix, alphabet, min_dfa, dense=None):
+        set_ = object.__setattr__
+        set_(self, "pattern", pattern)
+        set_(self, "postfix", postfix)
+        set_(self, "alphabet", tuple(alphabet))
+        set_(self, "min_dfa", min_dfa)
+        set_(self, "dense", dense if dense is not None else DenseDFA.from_min_dfa(*min_dfa, alphabet))
+        set_(self, "_batch", None)
+        set_(self, "_searcher", None)
+        set_(self, "prefilter", build_prefilter(postfix))
+        set_(self, "_matchers", {})
+        set_(self, "_lock", threading.Lock())
+        set_(self, "_analysis", None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CompiledPattern is immutable")
+
+    def __repr__(self):
+        return f"CompiledPattern({self.pattern!r})"
+
+    @property
+    def analysis(self):
+        """dfa_analysis.DFAAnalysis of the minimal DFA, built on first access."""
+        analysis = self._analysis
+        if analysis is None:
+            with self._lock:
+                analysis = self._analysis
+                if analysis is None:
+                    min_dfa_states, min_dfa_transitions, _, min_dfa_accepting = self.min_dfa
+                    analysis = DFAAnalysis(min_dfa_states, min_dfa_transitions, min_dfa_accepting, self.alphabet)
+                    object.__setattr__(self, "_analysis", analysis)
+        return analysis
+
+    def describe(self):
+        """Which literal prefilter runs before the DFA, and what it checks."""
+        return self.prefilter.describe()
+
+    def match(self, input_str):
+        """Check whether the whole string is accepted."""
+        prefilter = self.prefilter
+        if prefilter.kind != "none" and not prefilter.may_match(input_str):
+            return False
+        if prefilter.kind == "exact":
+            return True
+        return self.matcher()(input_str)
+
+    def matcher(self, kind="str"):
+        """The generated full-match function for str (kind='str') or bytes-like (kind='bytes') input."""
+        func = self._matchers.get(kind)
+        if func is None:
+            with self._lock:
+                func = self._matchers.get(kind)
+                if func is None:
+                    func = self._matchers[kind] = compile_matcher(*self.min_dfa, self.alphabet, kind=kind)
+        return func
+
+    def match_many(self, strings):
+        """Match many strings; a NumPy boolean array if NumPy is available, else a list."""
+        if batch_validate.np is None:
+            return [self.match(s) for s in strings]
+        batch = self._batch
+        if batch is None:
+            with self._lock:
+                batch = self._batch
+                if batch is None:
+                    batch = batch_validate.BatchValidator(self.dense)
+                    object.__setattr__(self, "_batch", batch)
+        return batch.validate(strings)
+
+    def _get_searcher(self):
+        searcher = self._searcher
+        if searcher is None:
+            with self._lock:
+                searcher = self._searcher
+                if searcher is None:
+                    searcher = Searcher(self.dense, prefilter=self.prefilter)
+                    object.__setattr__(self, "_searcher", searcher)
+        return searcher
+
+    def search(self, text, pos=0):
+        """(start, end) of the leftmost-longest match inside text, or None."""
+        return self._get_searcher().search(text, pos)
+
+    def finditer(self, text, pos=0):
+        """Yield (start, end) of every non-overlapping leftmost-longest match inside text."""
+        return self._get_searcher().finditer(text, pos)
+
+# Compile a regular expression without printing any tables
+def compile_pattern(infix, postfix=None, report=None, construction="followpos", simplify=False):
+    """Run the full regex -> minimal DFA pipeline and wrap the result.
+
+    Pass a pipeline.PipelineReport to collect per-stage timings and sizes.
+    construction selects the DFA construction ('followpos' or 'nfa', see
+    pipeline.run_pipeline); both give the same minimal DFA. simplify runs
+    the regex_ast rewrites first when no postfix form is given.
+    """
+    result = run_pipeline(infix, report=report, nfa_builder="compact", postfix=postfix, construction=construction,
+                          simplify=simplify)
+    compiled = CompiledPattern(infix, result.postfix, result.alphabet, result.min_dfa, result.dense)
+    if report is not None:
+        report.count("prefilter", compiled.prefilter.kind)
+    return compiled
+
+# Bounded, thread-safe LRU cache of compiled patterns
+class PatternCache:
+    """LRU cache of CompiledPattern objects keyed on the normalized (postfix) pattern.
+
+    Compilation runs outside the lock, so a slow compile never blocks
+    lookups of other patterns. If two threads miss on the same pattern at
+    once, both compile it and the first result inserted wins.
+    """
+    def __init__(self, maxsize=256):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, infix):
+        """Return the compiled pattern for infix, compiling it on a miss."""
+        key = RegextoNFA.shunt(infix)
+        with self._lock:
+            compiled = self._entries.get(key)
+            if compiled is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return compiled
+            self.misses += 1
+
+        compiled = compile_pattern(infix, key)
+
+        with self._lock:
+            existing = self._entries.get(key)
+            if existing is not None:
+                self._entries.move_to_end(key)
+                return existing
+            self._entries[key] = compiled
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return compiled
+
+    def clear(self):
+        """Drop every cached pattern and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def info(self):
+        """Cache size and hit/miss/eviction counters."""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+_cache = PatternCache()
+
+# Entry point: compile through the shared cache
+def compile(infix):
+    """Return the cached CompiledPattern for an infix regular expression."""
+    return _cache.get(infix)
+
+def cache_info():
+    """Counters of the shared compile cache."""
+    return _cache.info()
+
+def purge():
+    """Clear the shared compile cache."""
+    _cache.clear()
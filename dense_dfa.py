@@ -0,0 +1,171 @@
+from array import array
+from bisect import bisect_right
+
+from charclass import symbol_range
+from DFAtoMINDFA import hopcroft_blocks, minimize_dfa
+
+NO_STATE = 0xFFFFFFFF  # Table entry of a missing transition: the input is rejected
+
+# DFA with dense integer states in flat typed arrays
+class DenseDFA:
+    """A DFA whose states are the integers 0 .. num_states - 1.
+
+    alphabet   -- symbols sorted by code point
+    column     -- symbol -> table column
+    table      -- array('I') of num_states * num_symbols successors, row by
+                  row; NO_STATE where a transition is missing
+    initial    -- the initial state
+    accepting  -- bitmap, bit i (byte i >> 3, bit i & 7) set if state i accepts
+    This is the layout of dfa_format's binary file, so serialization only
+    copies the arrays.
+    """
+    __slots__ = ("alphabet", "column", "table", "initial", "accepting", "num_states", "num_symbols",
+                 "_firsts", "_lasts")
+
+    def __init__(self, alphabet, table, num_states, initial, accepting):
+        self.alphabet = list(alphabet)
+        self.column = {symbol: k for k, symbol in enumerate(self.alphabet)}
+        self.table = table
+        self.num_states = num_states
+        self.num_symbols = len(self.alphabet)
+        self.initial = initial
+        self.accepting = accepting
+        bounds = [symbol_range(symbol) for symbol in self.alphabet]
+        self._firsts = [first for first, _ in bounds]
+        self._lasts = [last for _, last in bounds]
+
+    @classmethod
+    def build(cls, alphabet, rows, initial, accepting_states):
+        """Build from per-state rows of successors (None or NO_STATE if missing), reordering columns by code point."""
+        order = sorted(range(len(alphabet)), key=lambda k: symbol_range(alphabet[k]))
+        table = array("I")
+        for row in rows:
+            table.extend(NO_STATE if row[k] is None else row[k] for k in order)
+        accepting = bytearray((len(rows) + 7) // 8)
+        for state in accepting_states:
+            accepting[state >> 3] |= 1 << (state & 7)
+        return cls([alphabet[k] for k in order], table, len(rows), initial, accepting)
+
+    @classmethod
+    def from_subsets(cls, masks, table, alphabet, accept_mask):
+        """Build from subset construction output (build_dfa_bitset, followpos).
+
+        masks[i] is the subset of table row i, and a state accepts when its
+        subset intersects accept_mask. States keep the subsets' discovery
+        order with the empty subset (the dead state) moved last, the order of
+        nfatodfa.bitset_to_dfa, so minimize() numbers the minimal states as
+        DFAtoMINDFA.minimize_dfa does on the frozenset-based DFA.
+        """
+        order = [i for i, mask in enumerate(masks) if mask]
+        order += [i for i, mask in enumerate(masks) if not mask]
+        number = [0] * len(masks)
+        for new, old in enumerate(order):
+            number[old] = new
+        rows = [[number[target] for target in table[old]] for old in order]
+        accepting = [new for new, old in enumerate(order) if masks[old] & accept_mask]
+        return cls.build(alphabet, rows, number[0], accepting)
+
+    @classmethod
+    def from_min_dfa(cls, min_dfa_states, min_dfa_transitions, min_dfa_initial, min_dfa_accepting, alphabet):
+        """Build from a frozenset-keyed minimal DFA; state i is min_dfa_states[i]."""
+        state_to_int = {state: i for i, state in enumerate(min_dfa_states)}
+        rows = [[state_to_int.get(min_dfa_transitions[state].get(symbol)) for symbol in alphabet]
+                for state in min_dfa_states]
+        accepting = [state_to_int[state] for state in min_dfa_accepting]
+        return cls.build(alphabet, rows, state_to_int[min_dfa_initial], accepting)
+
+    def to_min_dfa(self):
+        """(min_dfa_states, min_dfa_transitions, min_dfa_initial, min_dfa_accepting) with int states.
+
+        For the consumers that still take the dict-based shape; missing
+        transitions are left out of the inner dicts.
+        """
+        states = list(range(self.num_states))
+        transitions = {}
+        for state in states:
+            row = self.row(state)
+            transitions[state] = {symbol: target for symbol, target in zip(self.alphabet, row) if target != NO_STATE}
+        return states, transitions, self.initial, {state for state in states if self.is_accepting(state)}
+
+    def row(self, state):
+        """Successors of state, one per alphabet column."""
+        start = state * self.num_symbols
+        return self.table[start:start + self.num_symbols]
+
+    def is_accepting(self, state):
+        return bool(self.accepting[state >> 3] & (1 << (state & 7)))
+
+    def column_of(self, char):
+        """Alphabet column of a character, or -1 if it is not in the alphabet."""
+        code = ord(char)
+        k = bisect_right(self._firsts, code) - 1
+        if k >= 0 and code <= self._lasts[k]:
+            return k
+        return -1
+
+    def match(self, input_str):
+        """Check whether the whole string is accepted."""
+        table, width, column_of = self.table, self.num_symbols, self.column_of
+        state = self.initial
+        for char in input_str:
+            k = column_of(char)
+            if k < 0:
+                return False
+            state = table[state * width + k]
+            if state == NO_STATE:
+                return False
+        return self.is_accepting(state)
+
+    def minimize(self, tags=None):
+        """Return the minimal equivalent DenseDFA (Hopcroft, see DFAtoMINDFA.hopcroft_blocks).
+
+        Minimal states are numbered by their smallest original state, like
+        DFAtoMINDFA.hopcroft_minimize. tags optionally maps accepting states
+        to labels that must stay apart.
+        """
+        return self.minimize_tagged(tags)[0]
+
+    def minimize_tagged(self, tags=None, method="hopcroft"):
+        """minimize(), also returning the tags of the minimal accepting states.
+
+        Returns (minimal DenseDFA, {minimal state: tag}); the dict is empty
+        without tags. method 'table' runs DFAtoMINDFA's table-filling on the
+        integer states instead of Hopcroft; both number the states alike.
+        """
+        n, width, table = self.num_states, self.num_symbols, self.table
+        if method == "hopcroft":
+            sink = n
+            delta = []
+            for k in range(width):
+                column = table[k::width]
+                delta.append([sink if target == NO_STATE else target for target in column] + [sink])
+            keys = [(True if tags is None else tags[state]) if self.is_accepting(state) else None
+                    for state in range(n)]
+            blocks = hopcroft_blocks(delta, keys)
+            classes = sorted((block for block in blocks if sink not in block or len(block) > 1), key=min)
+            classes = [block - {sink} for block in classes]
+        else:
+            states, transitions, _, accepting = self.to_min_dfa()
+            dfa_transitions = {(state, symbol): target
+                               for state in states for symbol, target in transitions[state].items()}
+            classes = minimize_dfa(states, dfa_transitions, accepting, self.alphabet, method=method, tags=tags)[0]
+
+        class_of = [NO_STATE] * n
+        for number, block in enumerate(classes):
+            for state in block:
+                class_of[state] = number
+        rows = []
+        accepting = []
+        min_tags = {}
+        for number, block in enumerate(classes):
+            representative = min(block)
+            rows.append([NO_STATE if target == NO_STATE else class_of[target] for target in self.row(representative)])
+            if self.is_accepting(representative):
+                accepting.append(number)
+                if tags is not None:
+                    min_tags[number] = tags[representative]
+        return DenseDFA.build(self.alphabet, rows, class_of[self.initial], accepting), min_tags
+
+    def memory_bytes(self):
+        """Bytes held by the table and the accepting bitmap."""
+        return self.table.buffer_info()[1] * self.table.itemsize + len(self.accepting)
@@ -0,0 +1,107 @@
+from collections import deque
+
+from charclass import symbol_range
+
+MAX_SKIP_CHARS = 256  # Largest self-loop character set expanded for str.lstrip skipping
+SKIP_WINDOW = 64      # Characters examined by the first lstrip of a skip
+
+# Live states: those from which an accepting state is reachable
+def live_states(states, successors, accepting):
+    """Return the set of states that can reach an accepting state.
+
+    successors(state) yields the states reachable in one step; targets
+    outside states (e.g. a missing-transition marker) are ignored. One
+    breadth-first search over the reversed edges, from the accepting
+    states: O(states + edges).
+    """
+    predecessors = {}
+    for state in states:
+        for next_state in successors(state):
+            predecessors.setdefault(next_state, []).append(state)
+    live = set(accepting)
+    queue = deque(live)
+    while queue:
+        for source in predecessors.get(queue.popleft(), ()):
+            if source not in live:
+                live.add(source)
+                queue.append(source)
+    return live
+
+def _loop_chars(symbols):
+    """All characters covered by symbols as a string, or None if there are too many."""
+    total = 0
+    for symbol in symbols:
+        first, last = symbol_range(symbol)
+        total += last - first + 1
+    if total > MAX_SKIP_CHARS:
+        return None
+    chars = []
+    for symbol in symbols:
+        first, last = symbol_range(symbol)
+        chars.extend(map(chr, range(first, last + 1)))
+    return "".join(chars)
+
+# Early-exit labels of a minimal DFA
+class DFAAnalysis:
+    """Label every minimal DFA state as 'dead', 'accept_sink', 'self_loop' or 'plain'.
+
+    dead        -- no accepting state is reachable, so the input is rejected
+    accept_sink -- accepting and every alphabet symbol loops back, so only
+                   characters outside the alphabet can still reject
+    self_loop   -- some symbols loop back; runs of them can be skipped
+    For loop states whose loop characters are few enough, skip_chars holds
+    them as a string so runs can be skipped with str.lstrip.
+    """
+    def __init__(self, min_dfa_states, min_dfa_transitions, min_dfa_accepting, alphabet):
+        live = live_states(min_dfa_states, lambda state: min_dfa_transitions[state].values(), min_dfa_accepting)
+        self.dead = frozenset(state for state in min_dfa_states if state not in live)
+        self.kind = {}
+        self.loop_symbols = {}
+        self.skip_chars = {}
+        for state in min_dfa_states:
+            loops = [symbol for symbol in alphabet if min_dfa_transitions[state].get(symbol) == state]
+            if state in self.dead:
+                self.kind[state] = "dead"
+            elif state in min_dfa_accepting and loops and len(loops) == len(alphabet):
+                self.kind[state] = "accept_sink"
+            elif loops:
+                self.kind[state] = "self_loop"
+            else:
+                self.kind[state] = "plain"
+            if loops and state not in self.dead:
+                self.loop_symbols[state] = loops
+                chars = _loop_chars(loops)
+                if chars is not None:
+                    self.skip_chars[state] = (chars, frozenset(chars))
+        self.accept_sinks = frozenset(state for state, kind in self.kind.items() if kind == "accept_sink")
+
+    def counts(self):
+        """Number of states of each kind."""
+        result = {"dead": 0, "accept_sink": 0, "self_loop": 0, "plain": 0}
+        for kind in self.kind.values():
+            result[kind] += 1
+        return result
+
+    def skip(self, state, text, i):
+        """Index of the first character at or after i that does not loop on state."""
+        entry = self.skip_chars.get(state)
+        if entry is None or i >= len(text) or text[i] not in entry[1]:
+            return i
+        return skip_run(text, i, entry[0])
+
+# Skip a run of characters from a set
+def skip_run(text, i, chars):
+    """Index of the first character at or after i not in chars.
+
+    str.lstrip does the scanning in C. The window doubles while it is
+    stripped completely, so the cost is proportional to the run length.
+    """
+    window = SKIP_WINDOW
+    while i < len(text):
+        chunk = text[i:i + window]
+        rest = len(chunk.lstrip(chars))
+        i += len(chunk) - rest
+        if rest:
+            break
+        window *= 2
+    return i
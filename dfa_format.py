@@ -0,0 +1,176 @@
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from bisect import bisect_right
+
+import RegextoNFA
+from charclass import symbol_range
+from dense_dfa import NO_STATE, DenseDFA
+from pipeline import run_pipeline
+
+# Binary layout (all integers little-endian):
+#   header    32 bytes, see HEADER below
+#   alphabet  num_symbols pairs of u32 (first, last) code points, sorted
+#   table     num_states * num_symbols u32 next-state ids (NO_STATE = reject)
+#   accepting ceil(num_states / 8) bytes, bit i set if state i accepts
+MAGIC = b"MDFA"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIIIIII")  # magic, version, flags, states, symbols, initial, alphabet/table/accept offsets
+
+# Serialize a dense DFA to bytes
+def serialize_dense(dense):
+    """Encode a dense_dfa.DenseDFA in the binary format described above; its arrays already have this layout."""
+    ranges = array("I")
+    for symbol in dense.alphabet:
+        ranges.extend(symbol_range(symbol))
+    table = array("I", dense.table)
+    if sys.byteorder != "little":
+        ranges.byteswap()
+        table.byteswap()
+
+    num_states, num_symbols = dense.num_states, dense.num_symbols
+    alphabet_offset = HEADER.size
+    table_offset = alphabet_offset + 8 * num_symbols
+    accept_offset = table_offset + 4 * num_states * num_symbols
+    header = HEADER.pack(MAGIC, VERSION, 0, num_states, num_symbols, dense.initial,
+                         alphabet_offset, table_offset, accept_offset)
+    return header + ranges.tobytes() + table.tobytes() + bytes(dense.accepting)
+
+def serialize_min_dfa(min_dfa_states, min_dfa_transitions, min_dfa_initial, min_dfa_accepting, alphabet):
+    """Encode a minimal DFA in the binary format described above."""
+    return serialize_dense(DenseDFA.from_min_dfa(min_dfa_states, min_dfa_transitions, min_dfa_initial,
+                                                 min_dfa_accepting, alphabet))
+
+def write_min_dfa(path, min_dfa_states, min_dfa_transitions, min_dfa_initial, min_dfa_accepting, alphabet):
+    """Write a minimal DFA to path atomically (temp file + rename)."""
+    write_dense(path, DenseDFA.from_min_dfa(min_dfa_states, min_dfa_transitions, min_dfa_initial,
+                                            min_dfa_accepting, alphabet))
+
+def write_dense(path, dense):
+    """Write a dense_dfa.DenseDFA to path atomically (temp file + rename)."""
+    data = serialize_dense(dense)
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+# Read-only matcher over a memory-mapped DFA file
+class MappedDFA:
+    """Match strings directly against a serialized DFA.
+
+    The file is memory-mapped and its sections are viewed as typed
+    memoryviews, so no per-state Python objects are created.
+    """
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._load()
+        except BaseException:
+            self.close()
+            raise
+
+    def _load(self):
+        buffer = self._mmap
+        if len(buffer) < HEADER.size:
+            raise ValueError("Truncated DFA file")
+        (magic, version, _flags, self.num_states, self.num_symbols, self.initial,
+         alphabet_offset, table_offset, accept_offset) = HEADER.unpack_from(buffer)
+        if magic != MAGIC:
+            raise ValueError("Not a DFA file")
+        if version != VERSION:
+            raise ValueError(f"Unsupported DFA format version {version}")
+        if len(buffer) < accept_offset + (self.num_states + 7) // 8:
+            raise ValueError("Truncated DFA file")
+
+        view = memoryview(buffer)
+        if sys.byteorder == "little":
+            ranges = view[alphabet_offset:table_offset].cast("I")
+            self.table = view[table_offset:accept_offset].cast("I")
+        else:  # Big-endian hosts need a byte-swapped copy
+            ranges = array("I", bytes(view[alphabet_offset:table_offset]))
+            ranges.byteswap()
+            self.table = array("I", bytes(view[table_offset:accept_offset]))
+            self.table.byteswap()
+        self._firsts = ranges[0::2]
+        self._lasts = ranges[1::2]
+        self.accepting = view[accept_offset:accept_offset + (self.num_states + 7) // 8]
+        self._views = [view, ranges, self.table, self._firsts, self._lasts, self.accepting]
+
+    def column(self, char):
+        """Alphabet column of a character, or -1 if it is not in the alphabet."""
+        code = ord(char)
+        k = bisect_right(self._firsts, code) - 1
+        if k >= 0 and code <= self._lasts[k]:
+            return k
+        return -1
+
+    def is_accepting(self, state):
+        return bool(self.accepting[state >> 3] & (1 << (state & 7)))
+
+    def match(self, input_str):
+        """Check whether the whole string is accepted."""
+        table, width = self.table, self.num_symbols
+        state = self.initial
+        for char in input_str:
+            k = self.column(char)
+            if k < 0:
+                return False
+            state = table[state * width + k]
+            if state == NO_STATE:
+                return False
+        return self.is_accepting(state)
+
+    def close(self):
+        """Release the views and unmap the file."""
+        for view in reversed(getattr(self, "_views", [])):
+            if isinstance(view, memoryview):
+                view.release()
+        self._views = []
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# On-disk cache of compiled DFAs keyed by a pattern hash
+class ArtifactCache:
+    """Directory of serialized minimal DFAs, one file per normalized pattern.
+
+    The key hashes the postfix form and the format version, so a restart
+    (or another process) finds previous compilations and maps them
+    without running the pipeline again.
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+    def path_for(self, infix):
+        """File path of the artifact for an infix expression."""
+        postfix = RegextoNFA.shunt(infix)
+        digest = hashlib.sha256(f"{VERSION}:{postfix!r}".encode("utf-8", "surrogatepass")).hexdigest()
+        return os.path.join(self.directory, digest + ".mdfa")
+
+    def get(self, infix):
+        """Return a MappedDFA for infix, compiling and storing it on a miss."""
+        path = self.path_for(infix)
+        if os.path.exists(path):
+            self.hits += 1
+        else:
+            self.misses += 1
+            result = run_pipeline(infix, nfa_builder="compact")
+            write_dense(path, result.dense)
+        return MappedDFA(path)
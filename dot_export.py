@@ -0,0 +1,89 @@
+from charclass import CharClass, char_label, symbol_range
+from dense_dfa import NO_STATE, DenseDFA
+from dfa_analysis import live_states
+
+# Quote a label for a double-quoted Graphviz string
+def escape(text):
+    return text.replace("\\", "\\\\").replace('"', '\\"')
+
+# One edge label for every symbol leading to the same target
+def symbols_label(symbols):
+    """Merge symbols into a single character ("a") or a class label ("[a-cx]")."""
+    char_class = CharClass(symbol_range(symbol) for symbol in symbols)
+    if len(char_class.ranges) == 1 and char_class.ranges[0][0] == char_class.ranges[0][1]:
+        return char_label(char_class.ranges[0][0])
+    return repr(char_class)
+
+def _write_header(f, name, initial, accepting):
+    f.write(f"digraph {name} {{\n")
+    f.write("    rankdir=LR;\n")
+    f.write("    node [shape = point ]; qi;\n")
+    f.write("    node [shape = doublecircle];\n")
+    for state in accepting:
+        f.write(f"    {state};\n")
+    f.write("    node [shape = circle];\n")
+    f.write(f"    qi -> {initial};\n")
+
+def _write_edges(f, source, by_target):
+    """One edge per target; by_target maps a target name to its symbols, in edge order."""
+    for target, symbols in by_target.items():
+        f.write(f'    {source} -> {target} [ label = "{escape(symbols_label(symbols))}" ];\n')
+
+# Stream a DenseDFA as a Graphviz digraph
+def write_dense_dot(f, dense, hide_dead=False, name="DFA", prefix="S"):
+    """Write the DFA to the text file object f, one line at a time.
+
+    State i is named prefix + i. Parallel edges are merged into one edge
+    labelled with a character class. With hide_dead, states that cannot
+    reach an accepting state are left out along with every edge into them
+    (the initial state is always kept).
+    """
+    keep = None
+    if hide_dead:
+        states = range(dense.num_states)
+        keep = live_states(states, dense.row, [state for state in states if dense.is_accepting(state)])
+    accepting = [f"{prefix}{state}" for state in range(dense.num_states) if dense.is_accepting(state)]
+    _write_header(f, name, f"{prefix}{dense.initial}", accepting)
+    for state in range(dense.num_states):
+        if keep is not None and state not in keep and state != dense.initial:
+            continue
+        by_target = {}
+        for symbol, target in zip(dense.alphabet, dense.row(state)):
+            if target == NO_STATE or (keep is not None and target not in keep):
+                continue
+            by_target.setdefault(f"{prefix}{target}", []).append(symbol)
+        _write_edges(f, f"{prefix}{state}", by_target)
+    f.write("}\n")
+
+def write_min_dfa_dot(f, min_dfa_states, min_dfa_transitions, min_dfa_initial, min_dfa_accepting, alphabet,
+                      hide_dead=False):
+    """Write a minimal DFA; min_dfa_states[i] is named S<i>, as in the printed tables' order."""
+    dense = DenseDFA.from_min_dfa(min_dfa_states, min_dfa_transitions, min_dfa_initial, min_dfa_accepting, alphabet)
+    write_dense_dot(f, dense, hide_dead=hide_dead)
+
+def write_dfa_dot(f, dfa_states, dfa_transitions, dfa_initial, dfa_accepting, alphabet, hide_dead=False):
+    """Write the unminimized subset-construction DFA (transitions keyed by (state, symbol)); states are D<i>."""
+    state_to_int = {state: i for i, state in enumerate(dfa_states)}
+    rows = [[state_to_int.get(dfa_transitions.get((state, symbol))) for symbol in alphabet] for state in dfa_states]
+    accepting = [state_to_int[state] for state in dfa_accepting]
+    dense = DenseDFA.build(alphabet, rows, state_to_int[dfa_initial], accepting)
+    write_dense_dot(f, dense, hide_dead=hide_dead, prefix="D")
+
+# Stream an ε-NFA transition table as a Graphviz digraph
+def write_nfa_dot(f, trans, initial_id, accept_id, alphabet):
+    """Write an ε-NFA given as build_nfa_table / transition_view tables; state i is N<i>.
+
+    Symbol edges to the same target are merged like in the DFA graphs;
+    ε edges keep their own "ε" label.
+    """
+    _write_header(f, "NFA", f"N{initial_id}", [f"N{accept_id}"])
+    for state_id in range(len(trans)):
+        row = trans[state_id]
+        by_target = {}
+        for symbol in alphabet:
+            for target in sorted(row.get(symbol, ())):
+                by_target.setdefault(f"N{target}", []).append(symbol)
+        _write_edges(f, f"N{state_id}", by_target)
+        for target in sorted(row.get("ε", ())):
+            f.write(f'    N{state_id} -> N{target} [ label = "ε" ];\n')
+    f.write("}\n")
@@ -0,0 +1,113 @@
+from charclass import IntervalAlphabet
+from dense_dfa import DenseDFA
+from nfatodfa import bitset_to_dfa, mask_to_ids
+
+# Position sets of a postfix expression (Aho–Sethi–Ullman construction)
+class PositionTables:
+    """nullable/firstpos/lastpos/followpos for the augmented expression (r).#
+
+    Every literal or class token is a position; the end marker # is the
+    last one. Position sets are integer bitmasks. For each alphabet symbol
+    k, sources[k] is the mask of positions whose label covers it.
+    """
+    def __init__(self, postfix):
+        labels = []
+        follow = []
+        stack = []  # (nullable, firstpos, lastpos)
+        for c in postfix:
+            if c in ('*', '+', '?'):
+                nullable, first, last = stack.pop()
+                if c != '?':
+                    for i in mask_to_ids(last):
+                        follow[i] |= first
+                stack.append((nullable or c != '+', first, last))
+            elif c == '.':
+                nullable2, first2, last2 = stack.pop()
+                nullable1, first1, last1 = stack.pop()
+                for i in mask_to_ids(last1):
+                    follow[i] |= first2
+                stack.append((nullable1 and nullable2,
+                              first1 | first2 if nullable1 else first1,
+                              last1 | last2 if nullable2 else last2))
+            elif c == '|':
+                nullable2, first2, last2 = stack.pop()
+                nullable1, first1, last1 = stack.pop()
+                stack.append((nullable1 or nullable2, first1 | first2, last1 | last2))
+            else:  # Literal character or CharClass
+                bit = 1 << len(labels)
+                labels.append(c)
+                follow.append(0)
+                stack.append((False, bit, bit))
+        nullable, first, last = stack.pop()
+
+        # Augment with the end marker
+        self.end = len(labels)
+        end_bit = 1 << self.end
+        for i in mask_to_ids(last):
+            follow[i] |= end_bit
+        follow.append(0)
+        self.initial = first | end_bit if nullable else first
+        self.labels = labels
+        self.follow = follow
+
+        intervals = IntervalAlphabet(labels)
+        self.alphabet = intervals.alphabet
+        column = {symbol: k for k, symbol in enumerate(self.alphabet)}
+        self.sources = [0] * len(self.alphabet)
+        for i, label in enumerate(labels):
+            for symbol in intervals.symbols(label):
+                self.sources[column[symbol]] |= 1 << i
+        self.follow_unions = 0
+
+    def move(self, mask, k):
+        """Union of followpos over the positions in mask labelled with alphabet[k]."""
+        follow = self.follow
+        result = 0
+        for i in mask_to_ids(mask & self.sources[k]):
+            result |= follow[i]
+            self.follow_unions += 1
+        return result
+
+# Subset construction over followpos sets
+def followpos_subsets(tables):
+    """Return (masks, table): the position set of every DFA state and its successor ids per symbol."""
+    alphabet = tables.alphabet
+    ids = {tables.initial: 0}
+    masks = [tables.initial]
+    table = []
+    current = 0
+    while current < len(masks):
+        mask = masks[current]
+        row = []
+        for k in range(len(alphabet)):
+            next_mask = tables.move(mask, k)
+            next_id = ids.get(next_mask)
+            if next_id is None:
+                next_id = len(masks)
+                ids[next_mask] = next_id
+                masks.append(next_mask)
+            row.append(next_id)
+        table.append(row)
+        current += 1
+    return masks, table
+
+# Build a DFA directly from a postfix expression
+def build_dfa_followpos(postfix, tables=None):
+    """Run subset construction over followpos sets, with no ε-NFA in between.
+
+    Returns (dfa, alphabet) where dfa is (dfa_states, dfa_transitions,
+    dfa_initial, dfa_accepting) in the same shape nfatodfa.build_dfa
+    produces; each DFA state is the frozenset of its positions. Pass a
+    PositionTables to read its statistics afterwards.
+    """
+    if tables is None:
+        tables = PositionTables(postfix)
+    masks, table = followpos_subsets(tables)
+    return bitset_to_dfa(masks, table, tables.alphabet, 1 << tables.end), tables.alphabet
+
+def build_dense_followpos(postfix, tables=None):
+    """The followpos DFA as a dense_dfa.DenseDFA, without building any frozenset states."""
+    if tables is None:
+        tables = PositionTables(postfix)
+    masks, table = followpos_subsets(tables)
+    return DenseDFA.from_subsets(masks, table, tables.alphabet, 1 << tables.end)
@@ -0,0 +1,120 @@
+from collections import OrderedDict
+
+from charclass import SymbolIndex
+from nfatodfa import epsilon_closure, move
+
+# DFA built on demand from the ε-NFA, with a bounded LRU cache of states
+class LazyDFA:
+    """Match strings against an ε-NFA, creating DFA states only when reached.
+
+    Each cached DFA state is a frozenset of NFA IDs under an integer id,
+    with a dict of the transitions computed so far. Transition rows hold
+    ids, not the frozensets, and ids are never reused: a row entry whose
+    target has been evicted no longer resolves and is recomputed like a
+    miss. At most max_states frozensets and rows are kept, so memory is
+    bounded by max_states states plus max_states rows of small ints; the
+    least recently used state is evicted when the budget is exceeded. The
+    dead state (the empty set) has the fixed id DEAD and is never cached.
+    If a single input keeps evicting states (more than max_states
+    evictions while averaging fewer than min_chars_per_state characters
+    per new state), the cache is thrashing and the rest of that input is
+    matched by plain NFA simulation.
+    """
+    DEAD = 0
+
+    def __init__(self, nfa, trans, state_to_id, alphabet, max_states=1024, min_chars_per_state=10):
+        if max_states < 1:
+            raise ValueError("max_states must be at least 1")
+        self.trans = trans
+        self.symbols = SymbolIndex(alphabet)
+        self.accept_id = state_to_id[nfa.accept]
+        self.max_states = max_states
+        self.min_chars_per_state = min_chars_per_state
+        self.cache = OrderedDict()  # id -> (frozenset of NFA IDs, {symbol: id}), least recently used first
+        self.ids = {}               # frozenset of NFA IDs -> id, for the cached states
+        self._next_id = self.DEAD + 1
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.fallbacks = 0
+        self.initial = epsilon_closure({state_to_id[nfa.initial]}, trans)
+
+    def _intern(self, state):
+        """Id of a DFA state, caching it (and evicting the least recently used state) if absent."""
+        if not state:
+            return self.DEAD
+        state_id = self.ids.get(state)
+        if state_id is not None:
+            self.cache.move_to_end(state_id)
+            return state_id
+        state_id = self._next_id
+        self._next_id += 1
+        self.ids[state] = state_id
+        self.cache[state_id] = (state, {})
+        if len(self.cache) > self.max_states:
+            _, (evicted, _) = self.cache.popitem(last=False)
+            del self.ids[evicted]
+            self.evictions += 1
+        return state_id
+
+    def step(self, state_id, symbol):
+        """Return the id of the DFA state reached from a cached state on symbol, caching it."""
+        state, row = self.cache[state_id]
+        self.cache.move_to_end(state_id)
+        next_id = row.get(symbol)
+        if next_id is not None and (next_id == self.DEAD or next_id in self.cache):
+            self.hits += 1
+            return next_id
+        self.misses += 1
+        next_move = move(state, symbol, self.trans)
+        next_id = self._intern(epsilon_closure(next_move, self.trans) if next_move else frozenset())
+        row[symbol] = next_id
+        return next_id
+
+    def is_accepting(self, state):
+        """Check whether a DFA state contains the NFA accept state."""
+        return self.accept_id in state
+
+    def match(self, input_str):
+        """Check whether the whole input string is accepted."""
+        current = self._intern(self.initial)  # Never DEAD: the closure holds the NFA's initial state
+        evictions_before = self.evictions
+        misses_before = self.misses
+        lookup = self.symbols.lookup
+        for position, char in enumerate(input_str):
+            symbol = lookup(char)
+            if symbol is None:
+                return False
+            current = self.step(current, symbol)
+            if current == self.DEAD:
+                return False
+            if self.evictions - evictions_before > self.max_states:
+                new_states = self.misses - misses_before
+                if position + 1 < new_states * self.min_chars_per_state:
+                    self.fallbacks += 1
+                    return self._simulate(self.cache[current][0], input_str[position + 1:])
+        return self.is_accepting(self.cache[current][0])
+
+    def _simulate(self, current, input_str):
+        """Finish matching by NFA simulation, without touching the cache."""
+        lookup = self.symbols.lookup
+        for char in input_str:
+            symbol = lookup(char)
+            if symbol is None:
+                return False
+            next_move = move(current, symbol, self.trans)
+            if not next_move:
+                return False
+            current = epsilon_closure(next_move, self.trans)
+        return self.is_accepting(current)
+
+    def stats(self):
+        """Cache size and hit/miss/eviction counters."""
+        return {
+            "cached_states": len(self.cache),
+            "max_states": self.max_states,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "fallbacks": self.fallbacks,
+        }
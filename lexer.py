@@ -0,0 +1,108 @@
+from collections import namedtuple
+
+import RegextoNFA
+import nfatodfa
+from dense_dfa import DenseDFA
+from dfa_analysis import live_states
+from test_generation import generate_lexer_assembly
+
+Token = namedtuple("Token", "rule text start end")
+
+# Combine several postfix expressions into one ε-NFA
+def compile_rules(postfixes):
+    """Thompson-construct every rule and join them under a chain of ε-split states.
+
+    Returns (initial state, accept states in rule order).
+    """
+    rule_nfas = [RegextoNFA.compileRegex(postfix) for postfix in postfixes]
+    initial = current = RegextoNFA.State()
+    for k, rule_nfa in enumerate(rule_nfas):
+        current.edge1 = rule_nfa.initial
+        if k < len(rule_nfas) - 1:
+            current.edge2 = RegextoNFA.State()
+            current = current.edge2
+    return initial, [rule_nfa.accept for rule_nfa in rule_nfas]
+
+# Build the tagged minimal DFA of an ordered rule list
+def build_lexer_dfa(patterns, minimize_method="hopcroft"):
+    """Compile ordered infix patterns into one minimal DenseDFA whose accepting states carry rule numbers.
+
+    A DFA state that contains the accept states of several rules is tagged
+    with the earliest one (the highest priority), and minimization keeps
+    states with different tags apart. Returns (dense, tags) where tags
+    maps every accepting state of dense to its rule index.
+    """
+    if not patterns:
+        raise ValueError("A lexer needs at least one rule")
+    initial, accepts = compile_rules([RegextoNFA.shunt(pattern) for pattern in patterns])
+    trans, state_to_id, alphabet = RegextoNFA.build_nfa_table(RegextoNFA.NFA(initial, accepts[0]))
+    accept_ids = [state_to_id[accept] for accept in accepts]
+
+    masks, table = nfatodfa.build_dfa_bitset(state_to_id[initial], trans, alphabet)
+    accept_mask = 0
+    for state_id in accept_ids:
+        accept_mask |= 1 << state_id
+    dense = DenseDFA.from_subsets(masks, table, alphabet, accept_mask)
+    # State i of dense is the i-th non-empty subset (see DenseDFA.from_subsets)
+    subsets = [mask for mask in masks if mask]
+    dfa_tags = {state: min(k for k, state_id in enumerate(accept_ids) if mask >> state_id & 1)
+                for state, mask in enumerate(subsets) if mask & accept_mask}
+    return dense.minimize_tagged(dfa_tags, method=minimize_method)
+
+# Maximal-munch tokenizer over a combined rule automaton
+class Lexer:
+    """Tokenize text with an ordered list of (name, pattern) rules in a single pass.
+
+    At each position the DFA runs as far as it can; the longest prefix that
+    reaches an accepting state wins, and among rules matching that same
+    prefix the one listed first wins. Rules whose names are in skip (e.g.
+    whitespace) are matched but not returned.
+    """
+    def __init__(self, rules, skip=()):
+        self.names = [name for name, _ in rules]
+        self.skip = frozenset(skip)
+        self.dense, self.tags = build_lexer_dfa([pattern for _, pattern in rules])
+        self.alphabet = self.dense.alphabet
+        states = range(self.dense.num_states)
+
+        # States that can still reach an accepting state; edges into the others are dropped
+        live = live_states(states, self.dense.row, self.tags)
+        self._rows = tuple([target if target in live else None for target in self.dense.row(state)]
+                           for state in states)
+        self._rule = tuple(self.tags.get(state, -1) for state in states)
+        self._initial = self.dense.initial
+
+    def longest_match(self, text, pos=0):
+        """Return (rule index, end) of the longest non-empty match at pos, or None."""
+        rows, rule_of, column_of = self._rows, self._rule, self.dense.column_of
+        state = self._initial
+        best = None
+        for end in range(pos, len(text)):
+            k = column_of(text[end])
+            if k < 0:
+                break
+            state = rows[state][k]
+            if state is None:
+                break
+            if rule_of[state] >= 0:
+                best = (rule_of[state], end + 1)
+        return best
+
+    def tokens(self, text, pos=0):
+        """Yield Token(rule, text, start, end) for text[pos:]; raises ValueError where no rule matches."""
+        while pos < len(text):
+            match = self.longest_match(text, pos)
+            if match is None:
+                raise ValueError(f"No rule matches at position {pos}: {text[pos:pos + 20]!r}")
+            rule, end = match
+            if self.names[rule] not in self.skip:
+                yield Token(self.names[rule], text[pos:end], pos, end)
+            pos = end
+
+    def tokenize(self, text):
+        """Return the list of tokens of text."""
+        return list(self.tokens(text))
+
+    def assembly(self, **options):
+        """x86-64 tokenizer for the same rules (see test_generation.generate_lexer_assembly)."""
+        return generate_lexer_assembly(self.dense, self.tags, self.names, skip=self.skip, **options)
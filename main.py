@@ -1,88 +1,96 @@
 import RegextoNFA 
 import DFAtoMINDFA
 import nfatodfa
-from test_generation import generate_assembly
+import dot_export
+from dfa_analysis import DFAAnalysis
+from pipeline import PipelineReport, run_pipeline
+from test_generation import generate_assembly, generate_stream_assembly
+import argparse
 import os
-import sys
 
-def write_min_dfa_dot(states, transitions, start_state, accepting_states, filename):
-    dot_lines = []
-    dot_lines.append("digraph DFA {")
-    dot_lines.append("    rankdir=LR;")
-    dot_lines.append("    node [shape = point ]; qi;")
-
-    # Map states to simple names like S0, S1, ...
-    state_names = {}
-    for i, state in enumerate(states):
-        state_names[state] = f"S{i}"
-
-    # Accepting states
-    dot_lines.append("    node [shape = doublecircle];")
-    for state in accepting_states:
-        dot_lines.append(f"    {state_names[state]};")
-
-    dot_lines.append("    node [shape = circle];")
-    dot_lines.append(f"    qi -> {state_names[start_state]};")
-
-    for from_state, trans in transitions.items():
-        for symbol, to_state in trans.items():
-            dot_lines.append(f'    {state_names[from_state]} -> {state_names[to_state]} [ label = "{symbol}" ];')
-
-    dot_lines.append("}")
-
-    with open(filename, "w") as f:
-        f.write("\n".join(dot_lines))
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compile a regular expression to a minimal DFA and assembly.")
+    parser.add_argument("test_index", nargs="?", default=1, help="index used in the generated .dot file name")
+    parser.add_argument("--quiet", action="store_true", help="do not print the transition tables")
+    parser.add_argument("--stream", action="store_true", help="also write an x86-64 stdin filter to 'regex_stream.asm'")
+    parser.add_argument("--simplify", action="store_true",
+                        help="parse and simplify the expression before building the ε-NFA")
+    parser.add_argument("--backend", choices=["auto", "table", "direct"], default="auto",
+                        help="'regex.asm' layout: table-driven, direct-coded, or chosen by DFA size")
+    parser.add_argument("--hide-dead", action="store_true",
+                        help="leave states that cannot reach an accepting state out of the .dot graphs")
+    parser.add_argument("--dot-all", action="store_true",
+                        help="also write graphs of the ε-NFA and the unminimized DFA next to the minimal DFA graph")
+    parser.add_argument("--report", metavar="FILE", help="write a JSON per-stage timing/size report ('-' for stdout)")
+    return parser.parse_args()
 
 
 def main():
-    # Check if test index was passed as an argument
-    test_index = sys.argv[1] if len(sys.argv) > 1 else 1  # Default to 1 if not provided
+    args = parse_args()
+    test_index = args.test_index
     infix = input("Enter infix expression:")
     print()
     test_string = input("Enter test expression:")
     print()
     print(f"Processing regular expression: {infix}\n")
     
-    postfix = RegextoNFA.shunt(infix)
-    nfa = RegextoNFA.compileRegex(postfix)
-    
-    trans, state_to_id, alphabet = RegextoNFA.print_nfa_table(nfa)
-    
-    dfa_states, dfa_transitions, dfa_initial, dfa_accepting = nfatodfa.build_dfa(nfa, trans, state_to_id, alphabet)
-    nfatodfa.print_dfa_table(dfa_states, dfa_transitions, dfa_initial, dfa_accepting, alphabet)
-    
-    min_dfa_states, min_dfa_transitions, min_dfa_initial, min_dfa_accepting = DFAtoMINDFA.minimize_dfa(
-        dfa_states, dfa_transitions, dfa_accepting, alphabet
-    )
-    DFAtoMINDFA.print_min_dfa_table(min_dfa_states, min_dfa_transitions, min_dfa_initial, min_dfa_accepting, alphabet)
+    report = PipelineReport() if args.report else None
+    result = run_pipeline(infix, report=report, simplify=args.simplify)
+    nfa, trans, state_to_id, alphabet = result.nfa, result.trans, result.state_to_id, result.alphabet
+    dfa_states, dfa_transitions, dfa_initial, dfa_accepting = result.dfa
+    min_dfa_states, min_dfa_transitions, min_dfa_initial, min_dfa_accepting = result.min_dfa
+
+    if not args.quiet:
+        RegextoNFA.print_nfa_transitions(nfa, trans, state_to_id, alphabet)
+        nfatodfa.print_dfa_table(dfa_states, dfa_transitions, dfa_initial, dfa_accepting, alphabet)
+        DFAtoMINDFA.print_min_dfa_table(min_dfa_states, min_dfa_transitions, min_dfa_initial, min_dfa_accepting, alphabet)
 
     print("\nValidation result:")
-    print(DFAtoMINDFA.validate_string(test_string, min_dfa_transitions, min_dfa_initial, min_dfa_accepting, alphabet))
+    analysis = DFAAnalysis(min_dfa_states, min_dfa_transitions, min_dfa_accepting, alphabet)
+    print(DFAtoMINDFA.validate_string(test_string, min_dfa_transitions, min_dfa_initial, min_dfa_accepting, alphabet,
+                                      analysis=analysis))
 
     # Generate and write assembly code
-    asm_code = generate_assembly(
-        min_dfa_states,
-        min_dfa_transitions,
-        min_dfa_initial,
-        min_dfa_accepting,
-        alphabet,
-        test_string
-    )
+    asm_code = generate_assembly(result.dense, test_string, backend=args.backend)
 
     with open("regex.asm", "w") as f:
         f.write(asm_code)
     print("\nAssembly code generated in 'regex.asm'")
 
-    dot_output_dir = "/Users/siddharthsingh/Documents/Compilers-Project/minimal_dfa_graphs"
+    if args.stream:
+        with open("regex_stream.asm", "w") as f:
+            f.write(generate_stream_assembly(result.dense))
+        print("Stream matcher generated in 'regex_stream.asm'")
+
+    dot_output_dir = "minimal_dfa_graphs"
     os.makedirs(dot_output_dir, exist_ok=True)
 
     # Use the test_index to generate a unique file name for each test case
     base_filename = f"graph{test_index}"
     dot_file_path = os.path.join(dot_output_dir, f"{base_filename}.dot")
 
-    write_min_dfa_dot(min_dfa_states, min_dfa_transitions, min_dfa_initial, min_dfa_accepting, dot_file_path)
+    with open(dot_file_path, "w") as f:
+        dot_export.write_dense_dot(f, result.dense, hide_dead=args.hide_dead)
     print(f"Graphviz .dot file saved to: {dot_file_path}")
 
+    if args.dot_all:
+        nfa_file_path = os.path.join(dot_output_dir, f"{base_filename}_nfa.dot")
+        with open(nfa_file_path, "w") as f:
+            dot_export.write_nfa_dot(f, trans, state_to_id[nfa.initial], state_to_id[nfa.accept], alphabet)
+        dfa_file_path = os.path.join(dot_output_dir, f"{base_filename}_dfa.dot")
+        with open(dfa_file_path, "w") as f:
+            dot_export.write_dfa_dot(f, dfa_states, dfa_transitions, dfa_initial, dfa_accepting, alphabet,
+                                     hide_dead=args.hide_dead)
+        print(f"ε-NFA and DFA .dot files saved to: {nfa_file_path}, {dfa_file_path}")
+
+    if report is not None:
+        if args.report == "-":
+            print(report.to_json())
+        else:
+            with open(args.report, "w") as f:
+                f.write(report.to_json())
+            print(f"Pipeline report saved to: {args.report}")
+
 
 if __name__ == "__main__":
     main()
@@ -1,4 +1,5 @@
 from collections import deque
+from DFAtoMINDFA import hopcroft_minimize
 
 # Define the State class for the ε-NFA
 class State:
@@ -167,6 +168,7 @@ def build_dfa(nfa, trans, state_to_id, alphabet):
     """Build a DFA from the ε-NFA using subset construction."""
     initial_closure = epsilon_closure({state_to_id[nfa.initial]}, trans)
     dfa_states = [initial_closure]
+    seen = {initial_closure}  # Membership index over dfa_states, which keeps the discovery order
     dfa_transitions = {}
     queue = deque([initial_closure])
     marked = set()
@@ -180,7 +182,8 @@ def build_dfa(nfa, trans, state_to_id, alphabet):
             next_move = move(current, symbol, trans)
             if next_move:
                 next_closure = epsilon_closure(next_move, trans)
-                if next_closure not in dfa_states:
+                if next_closure not in seen:
+                    seen.add(next_closure)
                     dfa_states.append(next_closure)
                     queue.append(next_closure)
                 dfa_transitions[(current, symbol)] = next_closure
@@ -188,7 +191,7 @@ def build_dfa(nfa, trans, state_to_id, alphabet):
                 dfa_transitions[(current, symbol)] = frozenset()
     
     # Add dead state (empty set) if not present and set its transitions
-    if frozenset() not in dfa_states:
+    if frozenset() not in seen:
         dfa_states.append(frozenset())
     for symbol in alphabet:
         dfa_transitions[(frozenset(), symbol)] = frozenset()
@@ -229,8 +232,12 @@ def union(parent, i, j):
         parent[pi] = pj
 
 # Minimize the DFA
-def minimize_dfa(dfa_states, dfa_transitions, dfa_accepting, alphabet):
-    """Minimize the DFA using the table-filling method."""
+def minimize_dfa(dfa_states, dfa_transitions, dfa_accepting, alphabet, method="hopcroft"):
+    """Minimize the DFA using Hopcroft's algorithm or, with method='table', the table-filling method."""
+    if method == "hopcroft":
+        return hopcroft_minimize(dfa_states, dfa_transitions, dfa_accepting, alphabet)
+    if method != "table":
+        raise ValueError(f"Unknown minimization method: {method}")
     if not dfa_states:
         return [], {}, None, set()
     state_indices = {state: i for i, state in enumerate(dfa_states)}
@@ -19,8 +19,132 @@ def move(state_ids, symbol, trans):
         next_states.update(trans[state_id].get(symbol, []))
     return frozenset(next_states)
 
-def build_dfa(nfa, trans, state_to_id, alphabet):
+def mask_to_ids(mask):
+    """List the NFA state IDs set in a bitmask, lowest first."""
+    ids = []
+    while mask:
+        low = mask & -mask
+        ids.append(low.bit_length() - 1)
+        mask ^= low
+    return ids
+
+class ClosureTables:
+    """Precomputed ε-closures and post-closure move tables for an ε-NFA.
+
+    closure[s] is the ε-closure of NFA state s as a bitmask, and step[k][s]
+    is the ε-closure of the states s reaches on alphabet[k]. Because DFA
+    states are closed sets, a subset-construction transition is just the
+    union of step[k][s] over the states in the set.
+    """
+    def __init__(self, trans, alphabet):
+        self.alphabet = list(alphabet)
+        self.closure = self._closures(trans)
+        self.step = []
+        self.sources = []
+        for symbol in self.alphabet:
+            row = {}
+            sources = 0
+            for state_id in range(len(trans)):
+                targets = trans[state_id].get(symbol, ())
+                if targets:
+                    mask = 0
+                    for next_id in targets:
+                        mask |= self.closure[next_id]
+                    row[state_id] = mask
+                    sources |= 1 << state_id
+            self.step.append(row)
+            self.sources.append(sources)
+        self.step_unions = 0
+        self.intern_hits = 0
+        self.intern_misses = 0
+
+    @staticmethod
+    def _closures(trans):
+        """Compute the ε-closure of every NFA state, reusing finished closures."""
+        closure = [None] * len(trans)
+        for state_id in range(len(trans)):
+            mask = 1 << state_id
+            stack = [state_id]
+            while stack:
+                current = stack.pop()
+                for next_id in trans[current].get('ε', ()):
+                    bit = 1 << next_id
+                    if mask & bit:
+                        continue
+                    if closure[next_id] is not None:
+                        mask |= closure[next_id]
+                    else:
+                        mask |= bit
+                        stack.append(next_id)
+            closure[state_id] = mask
+        return closure
+
+    def move(self, mask, k):
+        """Closed successor set of a closed bitmask on alphabet[k]."""
+        row = self.step[k]
+        result = 0
+        for state_id in mask_to_ids(mask & self.sources[k]):
+            result |= row[state_id]
+            self.step_unions += 1
+        return result
+
+    def stats(self):
+        """Table sizes and reuse counters.
+
+        nfa_states closures and step_entries closed moves are computed once;
+        step_unions counts how often move() reused a step entry, and
+        intern_hits/intern_misses how often a successor set was an existing
+        or a new DFA state.
+        """
+        return {
+            "nfa_states": len(self.closure),
+            "closure_bits": sum(bin(mask).count("1") for mask in self.closure),
+            "step_entries": sum(len(row) for row in self.step),
+            "step_unions": self.step_unions,
+            "intern_hits": self.intern_hits,
+            "intern_misses": self.intern_misses,
+        }
+
+def build_dfa_bitset(initial_id, trans, alphabet, tables=None):
+    """Subset construction over integer bitmasks.
+
+    Each NFA state set is interned once in a dict mapping it to a dense DFA id.
+    Returns (masks, table) where masks[i] is the NFA state set of DFA state i
+    and table[i][k] is the id reached on alphabet[k]. Id 0 is the initial
+    state; the empty set (dead state) is interned like any other mask.
+    Pass a ClosureTables instance to reuse it or to read its statistics.
+    """
+    if tables is None:
+        tables = ClosureTables(trans, alphabet)
+    initial = tables.closure[initial_id]
+    ids = {initial: 0}
+    masks = [initial]
+    table = []
+    current = 0
+    while current < len(masks):
+        mask = masks[current]
+        row = []
+        for k in range(len(alphabet)):
+            next_mask = tables.move(mask, k)
+            next_id = ids.get(next_mask)
+            if next_id is None:
+                tables.intern_misses += 1
+                next_id = len(masks)
+                ids[next_mask] = next_id
+                masks.append(next_mask)
+            else:
+                tables.intern_hits += 1
+            row.append(next_id)
+        table.append(row)
+        current += 1
+    return masks, table
+
+def build_dfa(nfa, trans, state_to_id, alphabet, engine="bitset", tables=None):
     """Build a DFA from the ε-NFA using subset construction."""
+    if engine == "bitset":
+        return build_dfa_from_bitset(nfa, trans, state_to_id, alphabet, tables)
+    if engine != "sets":
+        raise ValueError(f"Unknown subset construction engine: {engine}")
     initial_closure = epsilon_closure({state_to_id[nfa.initial]}, trans)
     dfa_states = []
     dfa_transitions = {}
@@ -56,6 +180,31 @@ def build_dfa(nfa, trans, state_to_id, alphabet):
 
     return dfa_states, dfa_transitions, initial_closure, dfa_accepting
 
+def build_dfa_from_bitset(nfa, trans, state_to_id, alphabet, tables=None):
+    """Run the bitset engine and convert its result to the frozenset-based DFA."""
+    masks, table = build_dfa_bitset(state_to_id[nfa.initial], trans, alphabet, tables)
+    return bitset_to_dfa(masks, table, alphabet, 1 << state_to_id[nfa.accept])
+
+def bitset_to_dfa(masks, table, alphabet, accept_mask):
+    """Convert build_dfa_bitset output to (dfa_states, dfa_transitions, dfa_initial, dfa_accepting).
+
+    A DFA state accepts when its NFA set intersects accept_mask.
+    """
+    # Same state order as the set engine: discovery order, dead state last
+    order = [i for i, mask in enumerate(masks) if mask]
+    dead_id = next((i for i, mask in enumerate(masks) if not mask), None)
+    if dead_id is not None:
+        order.append(dead_id)
+    dfa_states = [frozenset(mask_to_ids(masks[i])) for i in range(len(masks))]
+
+    dfa_transitions = {}
+    for i, row in enumerate(table):
+        for symbol, next_id in zip(alphabet, row):
+            dfa_transitions[(dfa_states[i], symbol)] = dfa_states[next_id]
+
+    dfa_accepting = {dfa_states[i] for i, mask in enumerate(masks) if mask & accept_mask}
+    return [dfa_states[i] for i in order], dfa_transitions, dfa_states[0], dfa_accepting
+
 
 def print_dfa_table(dfa_states, dfa_transitions, dfa_initial, dfa_accepting, alphabet):
     """Print the transition table for the DFA."""
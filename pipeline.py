@@ -0,0 +1,191 @@
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import RegextoNFA
+import nfatodfa
+import followpos
+import regex_ast
+from dense_dfa import DenseDFA
+
+# Per-stage timing, memory and size counters for one compilation
+class PipelineReport:
+    """Structured record of a regex -> minimal DFA compilation.
+
+    Each stage records its wall time and, when track_memory is set, the
+    peak memory allocated while it ran (via tracemalloc). Counters hold
+    the sizes produced along the way.
+    """
+    def __init__(self, track_memory=True):
+        self.track_memory = track_memory
+        self.stages = []
+        self.counters = {}
+
+    @contextmanager
+    def stage(self, name):
+        """Time the enclosed block and record it as a stage."""
+        started_tracing = False
+        if self.track_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry = {"stage": name, "wall_time_s": time.perf_counter() - start}
+            if self.track_memory:
+                entry["peak_memory_bytes"] = max(0, tracemalloc.get_traced_memory()[1] - baseline)
+                if started_tracing:
+                    tracemalloc.stop()
+            self.stages.append(entry)
+
+    def count(self, name, value):
+        """Record a size or event counter."""
+        self.counters[name] = value
+
+    def as_dict(self):
+        """Return the report as plain data."""
+        return {
+            "stages": list(self.stages),
+            "total_wall_time_s": sum(entry["wall_time_s"] for entry in self.stages),
+            "counters": dict(self.counters),
+        }
+
+    def to_json(self, indent=2):
+        """Return the report as a JSON string."""
+        return json.dumps(self.as_dict(), indent=indent, ensure_ascii=False)
+
+# Everything the pipeline produced for one expression
+class PipelineResult:
+    def __init__(self, infix, postfix, nfa, trans, state_to_id, alphabet, dfa, min_dfa, dense=None, subsets=None):
+        self.infix = infix
+        self.postfix = postfix
+        self.nfa = nfa
+        self.trans = trans
+        self.state_to_id = state_to_id
+        self.alphabet = alphabet
+        self._dfa = dfa
+        self._subsets = subsets  # (masks, table, alphabet, accept_mask) from nfatodfa.build_dfa_bitset
+        self.min_dfa = min_dfa  # (min_dfa_states, min_dfa_transitions, min_dfa_initial, min_dfa_accepting)
+        self._dense = dense
+
+    @property
+    def dfa(self):
+        """(dfa_states, dfa_transitions, dfa_initial, dfa_accepting) with frozenset states, for printing.
+
+        Built from the subset construction on first access; None for the
+        followpos construction.
+        """
+        if self._dfa is None and self._subsets is not None:
+            self._dfa = nfatodfa.bitset_to_dfa(*self._subsets)
+        return self._dfa
+
+    @property
+    def dense(self):
+        """The minimal DFA as a dense_dfa.DenseDFA (state i is min_dfa_states[i])."""
+        if self._dense is None:
+            self._dense = DenseDFA.from_min_dfa(*self.min_dfa, self.alphabet)
+        return self._dense
+
+@contextmanager
+def _no_stage():
+    yield
+
+# Run the regex -> minimal DFA pipeline without printing anything
+def run_pipeline(infix, report=None, nfa_builder="thompson", minimize_method="hopcroft", postfix=None,
+                 construction="nfa", simplify=False):
+    """Compile an infix expression to its minimal DFA, optionally filling a PipelineReport.
+
+    construction 'nfa' builds an ε-NFA and runs subset construction on it;
+    nfa_builder is then 'thompson' (State objects, needed to print the ε-NFA
+    table) or 'compact' (array-backed CompactNFA). construction 'followpos'
+    builds the DFA straight from the postfix expression's position sets;
+    the result then has no nfa/trans/state_to_id/dfa. Either way the DFA is
+    a dense_dfa.DenseDFA minimized in place, and the min_dfa states are the
+    integers of result.dense; the frozenset-based result.dfa is only built
+    when asked for (to print it). With simplify, the
+    expression is parsed and rewritten by regex_ast.simplify instead of
+    going through shunt (unless a postfix form is passed in).
+    """
+    stage = report.stage if report is not None else (lambda name: _no_stage())
+
+    if simplify and postfix is None:
+        with stage("simplify"):
+            postfix, size_before, size_after = regex_ast.simplified_postfix(infix)
+        if report is not None:
+            report.count("tree_size_before", size_before)
+            report.count("tree_size_after", size_after)
+    else:
+        with stage("shunt"):
+            if postfix is None:
+                postfix = RegextoNFA.shunt(infix)
+
+    if construction == "followpos":
+        return _run_followpos(infix, postfix, report, stage, minimize_method)
+    if construction != "nfa":
+        raise ValueError(f"Unknown construction: {construction}")
+
+    with stage("nfa"):
+        if nfa_builder == "thompson":
+            nfa = RegextoNFA.compileRegex(postfix)
+            trans, state_to_id, alphabet = RegextoNFA.build_nfa_table(nfa)
+        elif nfa_builder == "compact":
+            nfa = RegextoNFA.compile_regex_compact(postfix)
+            trans, state_to_id, alphabet = nfa.transition_view()
+        else:
+            raise ValueError(f"Unknown NFA builder: {nfa_builder}")
+
+    with stage("dfa"):
+        tables = nfatodfa.ClosureTables(trans, alphabet)
+        masks, table = nfatodfa.build_dfa_bitset(state_to_id[nfa.initial], trans, alphabet, tables)
+        accept_mask = 1 << state_to_id[nfa.accept]
+        dense = DenseDFA.from_subsets(masks, table, alphabet, accept_mask)
+
+    with stage("minimize"):
+        min_dense = dense.minimize_tagged(method=minimize_method)[0]
+        min_dfa = min_dense.to_min_dfa()
+
+    if report is not None:
+        closure_stats = tables.stats()
+        report.count("postfix_length", len(postfix))
+        report.count("alphabet_size", len(alphabet))
+        report.count("nfa_states", len(trans))
+        report.count("dfa_states", dense.num_states)
+        report.count("min_dfa_states", min_dense.num_states)
+        report.count("closure_computations", closure_stats["nfa_states"])
+        report.count("closure_table_bits", closure_stats["closure_bits"])
+        report.count("closure_step_entries", closure_stats["step_entries"])
+        report.count("closure_step_unions", closure_stats["step_unions"])
+        report.count("dfa_intern_hits", closure_stats["intern_hits"])
+        report.count("dfa_intern_misses", closure_stats["intern_misses"])
+        report.count("transitions_built", dense.num_states * dense.num_symbols)
+
+    return PipelineResult(infix, postfix, nfa, trans, state_to_id, alphabet, None, min_dfa, min_dense,
+                          subsets=(masks, table, alphabet, accept_mask))
+
+def _run_followpos(infix, postfix, report, stage, minimize_method):
+    """Rest of run_pipeline for the followpos construction."""
+    with stage("positions"):
+        tables = followpos.PositionTables(postfix)
+
+    with stage("dfa"):
+        dense = followpos.build_dense_followpos(postfix, tables)
+
+    with stage("minimize"):
+        min_dense = dense.minimize_tagged(method=minimize_method)[0]
+        min_dfa = min_dense.to_min_dfa()
+
+    if report is not None:
+        report.count("postfix_length", len(postfix))
+        report.count("alphabet_size", dense.num_symbols)
+        report.count("positions", len(tables.follow))
+        report.count("dfa_states", dense.num_states)
+        report.count("min_dfa_states", min_dense.num_states)
+        report.count("followpos_unions", tables.follow_unions)
+        report.count("transitions_built", dense.num_states * dense.num_symbols)
+
+    return PipelineResult(infix, postfix, None, None, None, min_dense.alphabet, None, min_dfa, min_dense)
@@ -0,0 +1,167 @@
+from charclass import CharClass
+
+MAX_LITERALS = 16    # Largest literal set kept for one subexpression
+MAX_CLASS_CHARS = 4  # Character classes up to this size are expanded into literals
+
+# Literal facts about the language of one subexpression
+class LiteralInfo:
+    """Literal sets describing every string a subexpression matches.
+
+    exact    -- the whole (finite) language, or None
+    prefix   -- every match starts with one of these strings, or None
+    suffix   -- every match ends with one of these strings, or None
+    required -- every match contains at least one of these strings, or None
+    A set containing the empty string says nothing and is stored as None,
+    except in exact.
+    """
+    __slots__ = ("exact", "prefix", "suffix", "required")
+
+    def __init__(self, exact=None, prefix=None, suffix=None, required=None):
+        if exact is not None and len(exact) > MAX_LITERALS:
+            exact = None
+        self.exact = exact
+        self.prefix = _useful(prefix if prefix is not None else exact)
+        self.suffix = _useful(suffix if suffix is not None else exact)
+        self.required = _stronger(_useful(required), _useful(exact))
+
+def _useful(literals):
+    """Drop literal sets that cannot filter anything."""
+    if not literals or "" in literals or len(literals) > MAX_LITERALS:
+        return None
+    return frozenset(literals)
+
+def _cross(left, right):
+    """All concatenations a + b, or None if either side is unknown or the product is too large."""
+    if left is None or right is None or len(left) * len(right) > MAX_LITERALS:
+        return None
+    return frozenset(a + b for a in left for b in right)
+
+def _union(left, right):
+    if left is None or right is None:
+        return None
+    return left | right
+
+def _score(literals):
+    """Filtering strength of a literal set: longer shortest literal first, then fewer alternatives."""
+    if literals is None:
+        return (0, 0)
+    return (min(map(len, literals)), -len(literals))
+
+def _stronger(*candidates):
+    return max(candidates, key=_score)
+
+# Compute LiteralInfo bottom-up over postfix tokens
+def analyze(postfix):
+    """Return the LiteralInfo of a whole postfix expression (as produced by shunt)."""
+    stack = []
+    for c in postfix:
+        if c == '*':
+            stack.pop()
+            stack.append(LiteralInfo())
+        elif c == '+':
+            a = stack.pop()
+            stack.append(LiteralInfo(prefix=a.prefix, suffix=a.suffix, required=a.required))
+        elif c == '?':
+            a = stack.pop()
+            stack.append(LiteralInfo(exact=a.exact | {""} if a.exact is not None else None))
+        elif c == '|':
+            b = stack.pop()
+            a = stack.pop()
+            stack.append(LiteralInfo(exact=_union(a.exact, b.exact), prefix=_union(a.prefix, b.prefix),
+                                     suffix=_union(a.suffix, b.suffix), required=_union(a.required, b.required)))
+        elif c == '.':
+            b = stack.pop()
+            a = stack.pop()
+            prefix = a.prefix
+            if a.exact is not None:
+                prefix = _stronger(_cross(a.exact, b.prefix), _useful(a.exact), prefix)
+            suffix = b.suffix
+            if b.exact is not None:
+                suffix = _stronger(_cross(a.suffix, b.exact), _useful(b.exact), suffix)
+            required = _stronger(a.required, b.required, _cross(a.suffix, b.prefix))
+            stack.append(LiteralInfo(exact=_cross(a.exact, b.exact), prefix=prefix, suffix=suffix, required=required))
+        elif isinstance(c, CharClass):
+            size = sum(last - first + 1 for first, last in c.ranges)
+            if size <= MAX_CLASS_CHARS:
+                stack.append(LiteralInfo(exact=frozenset(chr(code) for first, last in c.ranges
+                                                         for code in range(first, last + 1))))
+            else:
+                stack.append(LiteralInfo())
+        else:  # Literal character
+            stack.append(LiteralInfo(exact=frozenset(c)))
+    return stack.pop()
+
+# Cheap literal checks run before the DFA
+class Prefilter:
+    """Literal prefilter chosen for a pattern.
+
+    kind is 'exact' when the pattern matches a small finite set of strings
+    (membership decides a full match by itself), 'literals' when some
+    prefix, suffix or required-substring set is known, and 'none' otherwise.
+    """
+    def __init__(self, info):
+        self.exact = info.exact
+        self.prefixes = tuple(sorted(info.prefix)) if info.prefix else ()
+        self.suffixes = tuple(sorted(info.suffix)) if info.suffix else ()
+        self.required = tuple(sorted(info.required, key=lambda s: (-len(s), s))) if info.required else ()
+        if self.exact is not None:
+            self.kind = "exact"
+        elif self.prefixes or self.suffixes or self.required:
+            self.kind = "literals"
+        else:
+            self.kind = "none"
+
+    def describe(self):
+        """Human-readable summary of the checks this prefilter performs."""
+        if self.kind == "exact":
+            return f"exact: match is one of {sorted(self.exact)!r}"
+        if self.kind == "none":
+            return "none: no required literal found, every input runs the DFA"
+        parts = []
+        if self.prefixes:
+            parts.append(f"prefix in {list(self.prefixes)!r}")
+        if self.suffixes:
+            parts.append(f"suffix in {list(self.suffixes)!r}")
+        if self.required:
+            parts.append(f"contains one of {list(self.required)!r}")
+        return "literals: " + "; ".join(parts)
+
+    def may_match(self, text):
+        """False if text certainly is not a full match."""
+        if self.exact is not None:
+            return text in self.exact
+        if self.prefixes and not text.startswith(self.prefixes):
+            return False
+        if self.suffixes and not text.endswith(self.suffixes):
+            return False
+        return self.may_contain(text)
+
+    def may_contain(self, text):
+        """False if no substring of text can match (a required literal is missing)."""
+        return not self.required or any(literal in text for literal in self.required)
+
+    def candidate_finder(self, text):
+        """Return next_start(pos): the first position >= pos where a prefix occurs, or len(text).
+
+        Match starts can only be at those positions. pos must not decrease
+        between calls; each literal is searched again only after pos passes
+        its previous occurrence, so a whole scan stays linear.
+        """
+        if not self.prefixes:
+            return None
+        end = len(text)
+        next_at = {literal: -2 for literal in self.prefixes}
+
+        def next_start(pos):
+            best = end
+            for literal, k in next_at.items():
+                if -1 < k < pos or k == -2:
+                    k = next_at[literal] = text.find(literal, pos)
+                if 0 <= k < best:
+                    best = k
+            return best
+        return next_start
+
+def build_prefilter(postfix):
+    """Analyze a postfix expression and return its Prefilter."""
+    return Prefilter(analyze(postfix))
@@ -0,0 +1,211 @@
+from functools import lru_cache
+
+from charclass import symbol_range
+from dfa_analysis import live_states
+
+MAX_SET_CHARS = 8  # Character runs up to this length are tested by set membership instead of a range compare
+LINEAR_DISPATCH = 4  # State blocks dispatched by an if/elif chain; larger groups are split by bisection
+MAX_LITERAL_RUN = 64  # Character runs up to this length are written out as string literals in 'table' rows
+MAX_TABLE_ENTRIES = 1 << 16  # Largest number of dict entries the 'table' layout may create
+ACCEPT_KEYS = {"str": "", "bytes": -1}  # Row key marking accepting states; iteration never yields it
+
+# Merge the code points of several symbols into sorted disjoint runs
+def _merge_runs(symbols, limit=None):
+    """Sorted (first, last) code point runs covered by symbols, clipped to limit."""
+    runs = []
+    for first, last in sorted(symbol_range(symbol) for symbol in symbols):
+        if limit is not None:
+            if first > limit:
+                continue
+            last = min(last, limit)
+        if runs and first <= runs[-1][1] + 1:
+            runs[-1] = (runs[-1][0], max(runs[-1][1], last))
+        else:
+            runs.append((first, last))
+    return runs
+
+# Python test for "c is one of these symbols"
+def _condition(symbols, kind):
+    """Boolean expression over the loop variable c for a group of symbols.
+
+    For kind='str' c is a 1-character string, for kind='bytes' it is an
+    int (bytes are read as Latin-1 code points). Returns None if no
+    character can satisfy it.
+    """
+    runs = _merge_runs(symbols, limit=0xFF if kind == "bytes" else None)
+    literal = repr if kind == "bytes" else (lambda code: repr(chr(code)))
+    singles = []
+    tests = []
+    for first, last in runs:
+        if last - first < MAX_SET_CHARS:
+            singles.extend(range(first, last + 1))
+        else:
+            tests.append(f"{literal(first)} <= c <= {literal(last)}")
+    if len(singles) == 1:
+        tests.insert(0, f"c == {literal(singles[0])}")
+    elif singles:
+        tests.insert(0, "c in {" + ", ".join(map(literal, singles)) + "}")
+    return " or ".join(tests) if tests else None
+
+# Source of one state's block: consume characters until the state changes
+def _state_block(number, row, accepting, kind, indent):
+    """Lines for one state: self-loop characters stay in a tight for loop."""
+    pad = " " * indent
+    lines = [f"{pad}for c in it:"]
+    by_target = {}
+    for symbol, target in row:
+        by_target.setdefault(target, []).append(symbol)
+    # The self-loop is tested first, then the most used targets
+    targets = sorted(by_target, key=lambda target: (target != number, -len(by_target[target]), target))
+    for target in targets:
+        test = _condition(by_target[target], kind)
+        if test is None:
+            continue
+        lines.append(f"{pad}    if {test}:")
+        if target == number:
+            lines.append(f"{pad}        continue")
+        else:
+            lines.append(f"{pad}        state = {target}")
+            lines.append(f"{pad}        break")
+    lines.append(f"{pad}    return False")
+    lines.append(f"{pad}else:")
+    lines.append(f"{pad}    return {accepting}")
+    return lines
+
+# Dispatch on the state number: if/elif for a few states, bisection above that
+def _dispatch(numbers, blocks, kind, indent):
+    """Lines selecting the block of the current state among numbers; blocks[n] is (row, accepting)."""
+    pad = " " * indent
+    if len(numbers) == 1:
+        return _state_block(numbers[0], *blocks[numbers[0]], kind, indent)
+    if len(numbers) <= LINEAR_DISPATCH:
+        lines = []
+        for i, number in enumerate(numbers):
+            if i == len(numbers) - 1:
+                lines.append(f"{pad}else:")
+            else:
+                lines.append(f"{pad}{'if' if i == 0 else 'elif'} state == {number}:")
+            lines.extend(_state_block(number, *blocks[number], kind, indent + 4))
+        return lines
+    middle = len(numbers) // 2
+    return ([f"{pad}if state < {numbers[middle]}:"] + _dispatch(numbers[:middle], blocks, kind, indent + 4)
+            + [f"{pad}else:"] + _dispatch(numbers[middle:], blocks, kind, indent + 4))
+
+# Row literal for a group of symbols that share a target
+def _keys(symbols, kind):
+    """Source of an iterable over every key (character or byte) the symbols cover."""
+    parts = []
+    singles = []
+    for first, last in _merge_runs(symbols, limit=0xFF if kind == "bytes" else None):
+        if kind == "bytes":
+            singles.extend(range(first, last + 1))
+        elif last - first < MAX_LITERAL_RUN:
+            singles.extend(map(chr, range(first, last + 1)))
+        else:
+            parts.append(f"map(chr, range({first}, {last + 1}))")
+    if singles:
+        parts.insert(0, repr(bytes(singles) if kind == "bytes" else "".join(singles)))
+    return parts
+
+def _table_source(order, rows, accepting, kind, name):
+    """Linked-row layout: each row maps a key straight to the next row object."""
+    accept_key = ACCEPT_KEYS[kind]
+    lines = [f"R = [{{}} for _ in range({len(order)})]"]
+    for number, row in enumerate(rows):
+        by_target = {}
+        for symbol, target in row:
+            by_target.setdefault(target, []).append(symbol)
+        for target, symbols in by_target.items():
+            for keys in _keys(symbols, kind):
+                lines.append(f"R[{number}].update(dict.fromkeys({keys}, R[{target}]))")
+        if accepting[number]:
+            lines.append(f"R[{number}][{accept_key!r}] = True  # Accept mark; never a key of the input")
+    lines.append("INITIAL = R[0]")
+    lines.append("")
+    lines.append(f"def {name}(s):")
+    lines.append("    row = INITIAL")
+    lines.append("    try:")
+    lines.append("        for c in s:")
+    lines.append("            row = row[c]")
+    lines.append("    except KeyError:")
+    lines.append("        return False")
+    lines.append(f"    return {accept_key!r} in row")
+    return lines
+
+def _branch_source(order, rows, accepting, kind, name):
+    """Compare/branch layout: per-state blocks over one shared iterator."""
+    blocks = {number: (row, accepting[number]) for number, row in enumerate(rows)}
+    lines = [f"def {name}(s):", "    it = iter(s)"]
+    if len(order) == 1:
+        lines.extend(_dispatch([0], blocks, kind, 4))
+    else:
+        lines.append("    state = 0")
+        lines.append("    while True:")
+        lines.extend(_dispatch(list(range(len(order))), blocks, kind, 8))
+    return lines
+
+def _table_entries(rows, kind):
+    limit = 0xFF if kind == "bytes" else None
+    return sum(last - first + 1 for row in rows for first, last in _merge_runs([symbol for symbol, _ in row], limit))
+
+# Generate a specialized Python matcher for one minimal DFA
+def generate_python(min_dfa_states, min_dfa_transitions, min_dfa_initial, min_dfa_accepting, alphabet,
+                    kind="str", layout="auto", name="match"):
+    """Return the source of a module defining name(s) -> bool, a full match of s.
+
+    States are numbered densely in breadth-first order from the initial
+    state and states that cannot reach an accepting state are left out,
+    so a character without a transition rejects at once and no separate
+    alphabet check is needed. Two layouts are generated:
+      'table'  -- one dict per state mapping each character straight to
+                  the dict of the next state: a single lookup per character;
+      'branch' -- per-state blocks of comparisons sharing one iterator; a
+                  block keeps consuming characters while they loop on its
+                  state, and wide ranges cost one compare instead of one
+                  dict entry per code point.
+    'auto' picks 'table' unless it would exceed MAX_TABLE_ENTRIES. kind is
+    'str' for strings or 'bytes' for bytes-like input (read as Latin-1).
+    """
+    if kind not in ACCEPT_KEYS:
+        raise ValueError(f"kind must be 'str' or 'bytes', not {kind!r}")
+    if layout not in ("auto", "table", "branch"):
+        raise ValueError(f"layout must be 'auto', 'table' or 'branch', not {layout!r}")
+    live = live_states(min_dfa_states, lambda state: min_dfa_transitions[state].values(), min_dfa_accepting)
+    if min_dfa_initial not in live:
+        return f"def {name}(s):\n    return False\n"
+
+    numbering = {min_dfa_initial: 0}
+    order = [min_dfa_initial]
+    for state in order:
+        for symbol in alphabet:
+            next_state = min_dfa_transitions[state].get(symbol)
+            if next_state in live and next_state not in numbering:
+                numbering[next_state] = len(order)
+                order.append(next_state)
+    rows = [[(symbol, numbering[min_dfa_transitions[state][symbol]]) for symbol in alphabet
+             if min_dfa_transitions[state].get(symbol) in numbering] for state in order]
+    accepting = [state in min_dfa_accepting for state in order]
+
+    if layout == "auto":
+        layout = "table" if _table_entries(rows, kind) <= MAX_TABLE_ENTRIES else "branch"
+    build = _table_source if layout == "table" else _branch_source
+    return "\n".join(build(order, rows, accepting, kind, name)) + "\n"
+
+# Compile generated source once per distinct automaton
+@lru_cache(maxsize=256)
+def _load(source, name):
+    namespace = {}
+    exec(compile(source, f"<dfa matcher {name}>", "exec"), namespace)
+    func = namespace[name]
+    func.source = source
+    return func
+
+def compile_matcher(min_dfa_states, min_dfa_transitions, min_dfa_initial, min_dfa_accepting, alphabet, kind="str",
+                    layout="auto"):
+    """Return the generated matcher as a callable; its source is in the .source attribute.
+
+    Identical automata produce identical source, which is compiled only once.
+    """
+    source = generate_python(min_dfa_states, min_dfa_transitions, min_dfa_initial, min_dfa_accepting, alphabet,
+                             kind=kind, layout=layout)
+    return _load(source, "match")
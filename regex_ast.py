@@ -0,0 +1,231 @@
+from collections import namedtuple
+
+from charclass import CharClass, literal_token, tokenize
+
+# Base of the expression tree nodes
+class Node(tuple):
+    """Immutable tuple that only equals nodes of the same type, so Star(x) != Plus(x)."""
+    __slots__ = ()
+
+    def __eq__(self, other):
+        return type(self) is type(other) and tuple.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((type(self).__name__, tuple.__hash__(self)))
+
+# Tree nodes; Concat and Alternation hold tuples of two or more items
+class Literal(Node, namedtuple("Literal", "token")):  # A character, or a CharClass token
+    __slots__ = ()
+
+class Concat(Node, namedtuple("Concat", "items")):
+    __slots__ = ()
+
+class Alternation(Node, namedtuple("Alternation", "items")):
+    __slots__ = ()
+
+class Star(Node, namedtuple("Star", "child")):
+    __slots__ = ()
+
+class Plus(Node, namedtuple("Plus", "child")):
+    __slots__ = ()
+
+class Optional(Node, namedtuple("Optional", "child")):
+    __slots__ = ()
+
+REPEATS = {"*": Star, "+": Plus, "?": Optional}
+
+# Recursive-descent parser for the infix syntax accepted by shunt
+class Parser:
+    """Parse an infix expression into a tree.
+
+    Grammar ('.' is explicit concatenation):
+        alternation := concat ('|' concat)*
+        concat      := repeat ('.' repeat)*
+        repeat      := atom ('*' | '+' | '?')*
+        atom        := '(' alternation ')' | literal
+    """
+    def __init__(self, infix):
+        self.infix = infix
+        self.tokens = tokenize(infix)
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def error(self, message):
+        raise ValueError(f"{message} at token {self.pos} of {self.infix!r}")
+
+    def parse(self):
+        node = self.alternation()
+        if self.pos < len(self.tokens):
+            self.error(f"Unexpected {self.peek()!r}")
+        return node
+
+    def alternation(self):
+        items = [self.concat()]
+        while self.peek() == "|":
+            self.pos += 1
+            items.append(self.concat())
+        return items[0] if len(items) == 1 else Alternation(tuple(items))
+
+    def concat(self):
+        items = [self.repeat()]
+        while self.peek() == ".":
+            self.pos += 1
+            items.append(self.repeat())
+        return items[0] if len(items) == 1 else Concat(tuple(items))
+
+    def repeat(self):
+        node = self.atom()
+        while self.peek() in REPEATS:
+            node = REPEATS[self.peek()](node)
+            self.pos += 1
+        return node
+
+    def atom(self):
+        token = self.peek()
+        if token is None:
+            self.error("Unexpected end of expression")
+        if token == "(":
+            self.pos += 1
+            node = self.alternation()
+            if self.peek() != ")":
+                self.error("Missing ')'")
+            self.pos += 1
+            return node
+        if isinstance(token, str) and token in "|.)*+?":
+            self.error(f"Unexpected {token!r}")
+        self.pos += 1
+        return Literal(token)
+
+def parse(infix):
+    """Parse an infix expression (the syntax shunt accepts) into a tree."""
+    return Parser(infix).parse()
+
+# Tree size: the number of nodes
+def size(node):
+    if isinstance(node, Literal):
+        return 1
+    if isinstance(node, (Concat, Alternation)):
+        return 1 + sum(size(item) for item in node.items)
+    return 1 + size(node.child)
+
+# Postfix tokens of a tree, in shunt's output format
+def to_postfix(node):
+    """Return the postfix form: a string, or a tuple if any token is a CharClass."""
+    tokens = []
+    _emit(node, tokens)
+    if any(isinstance(token, CharClass) for token in tokens):
+        return tuple(tokens)
+    return "".join(tokens)
+
+def _emit(node, tokens):
+    if isinstance(node, Literal):
+        tokens.append(node.token)
+    elif isinstance(node, (Concat, Alternation)):
+        operator = "." if isinstance(node, Concat) else "|"
+        _emit(node.items[0], tokens)
+        for item in node.items[1:]:
+            _emit(item, tokens)
+            tokens.append(operator)
+    else:
+        _emit(node.child, tokens)
+        tokens.append({Star: "*", Plus: "+", Optional: "?"}[type(node)])
+
+# Simplifying rewrites that keep the language unchanged
+def simplify(node):
+    """Return an equivalent, normalized tree, rewritten bottom-up.
+
+    Repeats:      (x*)* (x+)* (x?)* (x*)+ (x+)? (x?)+ (x*)? -> x*,
+                  (x+)+ -> x+, (x?)? -> x?
+    Concatenation is flattened and adjacent repeats of one operand merge:
+                  x*.x* -> x*, x.x* x*.x x*.x+ x+.x* -> x+, x?.x* x*.x? -> x*
+    Alternation is flattened, duplicates are dropped, alternatives already
+    covered by a repeat of another one are dropped (x|x* -> x*), and all
+    single-character and class alternatives merge into one class
+    (a|b|[0-9] -> [0-9ab]).
+    """
+    if isinstance(node, Literal):
+        return node
+    if isinstance(node, Concat):
+        return _simplify_concat(node)
+    if isinstance(node, Alternation):
+        return _simplify_alternation(node)
+    return _repeat(type(node), simplify(node.child))
+
+def _repeat(kind, child):
+    """kind(child) with nested repeats collapsed."""
+    if isinstance(child, (Star, Plus, Optional)):
+        inner = type(child)
+        if kind is inner:
+            return child
+        return Star(child.child)  # Any other mix of two repeats allows zero or more
+    return kind(child)
+
+def _split(node):
+    """(operand, repeat kind) of a term; kind is None for a plain operand."""
+    if isinstance(node, (Star, Plus, Optional)):
+        return node.child, type(node)
+    return node, None
+
+# Adjacent terms x^m . x^n over the same operand x, as a single repeat
+CONCAT_MERGES = {
+    (Star, Star): Star, (Optional, Star): Star, (Star, Optional): Star,
+    (None, Star): Plus, (Star, None): Plus, (Star, Plus): Plus, (Plus, Star): Plus,
+}
+
+def _simplify_concat(node):
+    items = []
+    for item in node.items:
+        item = simplify(item)
+        for part in item.items if isinstance(item, Concat) else (item,):
+            if items:
+                left, left_kind = _split(items[-1])
+                right, right_kind = _split(part)
+                merged = CONCAT_MERGES.get((left_kind, right_kind))
+                if merged is not None and left == right:
+                    items[-1] = merged(left)
+                    continue
+            items.append(part)
+    return items[0] if len(items) == 1 else Concat(tuple(items))
+
+def _simplify_alternation(node):
+    items = []
+    for item in node.items:
+        item = simplify(item)
+        for part in item.items if isinstance(item, Alternation) else (item,):
+            if part not in items:
+                items.append(part)
+
+    # x is covered by x*, x+ and x?; x+ and x? are covered by x*
+    covered = set()
+    for item in items:
+        operand, kind = _split(item)
+        if kind is not None:
+            covered.add(operand)
+            if kind is Star:
+                covered.update((Plus(operand), Optional(operand)))
+    items = [item for item in items if item not in covered]
+
+    literals = [item.token for item in items if isinstance(item, Literal)]
+    if len(literals) > 1:
+        ranges = []
+        for token in literals:
+            ranges.extend(token.ranges if isinstance(token, CharClass) else [(ord(token), ord(token))])
+        merged = CharClass(ranges)
+        if len(merged.ranges) == 1 and merged.ranges[0][0] == merged.ranges[0][1]:
+            merged = literal_token(chr(merged.ranges[0][0]))
+        first = next(i for i, item in enumerate(items) if isinstance(item, Literal))
+        items = [item for item in items if not isinstance(item, Literal)]
+        items.insert(first, Literal(merged))
+    return items[0] if len(items) == 1 else Alternation(tuple(items))
+
+# Parse, simplify and return the postfix form for the NFA builders
+def simplified_postfix(infix):
+    """Return (postfix, size before, size after) for an infix expression."""
+    tree = parse(infix)
+    simplified = simplify(tree)
+    return to_postfix(simplified), size(tree), size(simplified)
@@ -0,0 +1,229 @@
+import threading
+
+from dfa_analysis import live_states
+from nfatodfa import mask_to_ids
+
+# Leftmost-longest substring search over a minimal DFA
+class Searcher:
+    """Find pattern occurrences inside text using the minimal DFA (a dense_dfa.DenseDFA) only.
+
+    Two passes over the text, each driven by a lazily built automaton, so
+    a search is linear in the length of the text:
+      1. a forward unanchored scan (the minimal DFA restarted at every
+         position, run as a subset automaton) finds where the last match
+         ends, or that there is no match at all;
+      2. a reverse scan with the reversed DFA, from that end back to the
+         start, computes for every position the end of the longest match
+         starting there (see longest_ends).
+    The matches are then read off the precomputed ends without rescanning.
+    Subset states are bitmasks of minimal DFA states; their transitions are
+    cached and the caches are flushed when they exceed max_cached entries.
+    Cache hits are lock-free; misses and flushes take a per-instance lock,
+    so one Searcher can be shared between threads.
+    An optional prefilter.Prefilter rejects texts missing a required
+    literal, and its prefix literals let the forward scan jump straight
+    to the next position where a match can start.
+    """
+    def __init__(self, dense, max_cached=4096, prefilter=None):
+        self.prefilter = prefilter
+        states = range(dense.num_states)
+        self.alphabet = dense.alphabet
+        self.initial = dense.initial
+        self.accepting = [dense.is_accepting(state) for state in states]
+        self.accept_mask = 0
+        for state in states:
+            if self.accepting[state]:
+                self.accept_mask |= 1 << state
+
+        # States that cannot reach an accepting state are dropped (-1), like missing transitions
+        live = live_states(states, dense.row, [state for state in states if self.accepting[state]])
+        self.rows = [[target if target in live else -1 for target in dense.row(state)] for state in states]
+        # forward_bits[k][q]: bit of the successor of q on symbol k; reverse_bits[k][q]: predecessors of q
+        self.forward_bits = [[1 << row[k] if row[k] >= 0 else 0 for row in self.rows]
+                             for k in range(len(self.alphabet))]
+        self.reverse_bits = [[0] * len(self.rows) for _ in self.alphabet]
+        for q, row in enumerate(self.rows):
+            for k, target in enumerate(row):
+                if target >= 0:
+                    self.reverse_bits[k][target] |= 1 << q
+
+        self.max_cached = max_cached
+        self._column_of = dense.column_of
+        self._columns = {}
+        self._forward_cache = {}
+        self._longest_cache = {}
+        self._lock = threading.Lock()
+
+    def _column(self, char):
+        """Alphabet index of char, or -1 if it is outside the alphabet."""
+        k = self._columns.get(char)
+        if k is None:
+            k = self._column_of(char)
+            with self._lock:
+                self._columns[char] = k
+        return k
+
+    def _step(self, cache, bits, mask, k, restart):
+        """Cached subset transition: the successors of mask on column k, plus restart."""
+        row = cache.get(mask)
+        if row is not None:
+            next_mask = row.get(k)
+            if next_mask is not None:
+                return next_mask
+        next_mask = restart
+        if k >= 0:
+            column = bits[k]
+            for q in mask_to_ids(mask):
+                next_mask |= column[q]
+        with self._lock:
+            row = cache.get(mask)
+            if row is None:
+                if len(cache) >= self.max_cached:
+                    cache.clear()
+                row = cache[mask] = {}
+            row[k] = next_mask
+        return next_mask
+
+    def last_match_end(self, text, pos=0):
+        """End of the last match ending in text[pos:], or -1 if text[pos:] contains no match."""
+        restart = 1 << self.initial
+        mask = restart
+        last = pos if self.accepting[self.initial] else -1
+        accept_mask, bits, cache, column = self.accept_mask, self.forward_bits, self._forward_cache, self._column
+        next_start = self.prefilter.candidate_finder(text) if self.prefilter is not None else None
+        j, end = pos, len(text)
+        while j < end:
+            if mask == restart and next_start is not None:
+                # No match in progress: skip to where a prefix literal occurs
+                j = next_start(j)
+                if j >= end:
+                    break
+            mask = self._step(cache, bits, mask, column(text[j]), restart)
+            if mask & accept_mask:
+                last = j + 1
+            j += 1
+        return last
+
+    def _longest_step(self, masks, k):
+        """Cached reverse step of longest_ends: (next masks, source index of each, entry holding the initial state).
+
+        masks is a tuple of disjoint bitmasks of minimal DFA states, ordered
+        by decreasing match end. Each moves to its predecessors on column
+        k, minus the states already claimed by a larger end; the accepting
+        states not claimed yet start a new entry (source -1), the empty
+        match at the current position.
+        """
+        row = self._longest_cache.get(masks)
+        if row is not None:
+            step = row.get(k)
+            if step is not None:
+                return step
+        bits = self.reverse_bits[k] if k >= 0 else None
+        covered = 0
+        next_masks = []
+        sources = []
+        for index, mask in enumerate(masks):
+            previous = 0
+            if bits is not None:
+                for q in mask_to_ids(mask):
+                    previous |= bits[q]
+            previous &= ~covered
+            if previous:
+                next_masks.append(previous)
+                sources.append(index)
+                covered |= previous
+        fresh = self.accept_mask & ~covered
+        if fresh:
+            next_masks.append(fresh)
+            sources.append(-1)
+        initial_bit = 1 << self.initial
+        holder = next((index for index, mask in enumerate(next_masks) if mask & initial_bit), -1)
+        step = (tuple(next_masks), tuple(sources), holder)
+        with self._lock:
+            row = self._longest_cache.get(masks)
+            if row is None:
+                if len(self._longest_cache) >= self.max_cached:
+                    self._longest_cache.clear()
+                row = self._longest_cache[masks] = {}
+            row[k] = step
+        return step
+
+    def longest_ends(self, text, end, pos=0):
+        """(starts, ends) for the matches inside text[pos:end], from one reverse scan.
+
+        ends[i - pos] is the largest j <= end such that text[i:j] matches,
+        or -1, and starts[i - pos] is 1 exactly where ends[i - pos] >= 0.
+        The scan carries, for each candidate end j, the set of minimal DFA
+        states from which text[i:j] reaches an accepting state; a state
+        belongs to the largest such j only, so at most one entry per DFA
+        state is live and every character costs one cached step plus the
+        remapping of the live ends.
+        """
+        size = end - pos + 1
+        starts = bytearray(size)
+        ends = [-1] * size
+        initial_bit = 1 << self.initial
+        masks = (self.accept_mask,) if self.accept_mask else ()
+        match_ends = [end] if masks else []
+        if self.accept_mask & initial_bit:
+            starts[end - pos] = 1
+            ends[end - pos] = end
+        step, column = self._longest_step, self._column
+        for i in range(end - 1, pos - 1, -1):
+            masks, sources, holder = step(masks, column(text[i]))
+            match_ends = [match_ends[source] if source >= 0 else i for source in sources]
+            if holder >= 0:
+                starts[i - pos] = 1
+                ends[i - pos] = match_ends[holder]
+        return starts, ends
+
+    def longest_match(self, text, start, end=None):
+        """End of the longest match of text[start:j] with j <= end, or -1 if none."""
+        if end is None:
+            end = len(text)
+        rows, accepting, column = self.rows, self.accepting, self._column
+        state = self.initial
+        best = start if accepting[state] else -1
+        for j in range(start, end):
+            k = column(text[j])
+            state = rows[state][k] if k >= 0 else -1
+            if state < 0:
+                break
+            if accepting[state]:
+                best = j + 1
+        return best
+
+    def finditer(self, text, pos=0):
+        """Yield (start, end) of every non-overlapping leftmost-longest match in text[pos:].
+
+        An empty match is reported where no longer match begins, and the
+        search then resumes one character later.
+        """
+        if self.prefilter is not None:
+            if not self.prefilter.may_contain(text[pos:] if pos else text):
+                return
+            next_start = self.prefilter.candidate_finder(text)
+            if next_start is not None:
+                pos = next_start(pos)
+        end = self.last_match_end(text, pos)
+        if end < 0:
+            return
+        starts, ends = self.longest_ends(text, end, pos)
+        offset = 0
+        while offset <= end - pos:
+            offset = starts.find(1, offset)
+            if offset < 0:
+                return
+            start = pos + offset
+            stop = ends[offset]
+            yield start, stop
+            offset = stop - pos if stop > start else offset + 1
+
+    def search(self, text, pos=0):
+        """(start, end) of the leftmost-longest match in text[pos:], or None."""
+        return next(self.finditer(text, pos), None)
+
+# Find every match of a minimal DFA inside a string
+def finditer(text, dense):
+    """Yield (start, end) spans of the leftmost-longest non-overlapping matches of a DenseDFA in text."""
+    return Searcher(dense).finditer(text)
@@ -0,0 +1,132 @@
+import mmap
+
+from charclass import symbol_range
+from dense_dfa import NO_STATE
+
+# Byte-indexed transition rows for a minimal DFA
+def byte_transition_rows(dense):
+    """Return one 256-entry row per state of a dense_dfa.DenseDFA plus a trailing reject-sink row.
+
+    Bytes are read as Latin-1 code points, so the parts of the alphabet
+    above U+00FF can never match; every other byte leads to the sink.
+    """
+    sink = dense.num_states
+    spans = [(first, min(last, 255) + 1) for first, last in map(symbol_range, dense.alphabet)]
+    rows = []
+    for state in range(dense.num_states):
+        row = [sink] * 256
+        for (first, stop), next_state in zip(spans, dense.row(state)):
+            if first < 256:
+                row[first:stop] = [sink if next_state == NO_STATE else next_state] * (stop - first)
+        rows.append(row)
+    rows.append([sink] * 256)
+    return rows
+
+# Incremental DFA matcher over bytes-like chunks
+class StreamMatcher:
+    """Run a minimal dense_dfa.DenseDFA over input that arrives in chunks.
+
+    feed() keeps the DFA state across calls, so the concatenation of all
+    chunks is matched as one string. feed_lines() instead treats b'\\n' as
+    a record separator and yields one accept/reject result per completed
+    line. Chunks may be bytes, bytearray, memoryview or mmap objects and
+    are never copied.
+    """
+    def __init__(self, dense):
+        self.rows = byte_transition_rows(dense)
+        self.sink = dense.num_states
+        self.initial = dense.initial
+        self.accepting = [dense.is_accepting(state) for state in range(self.sink)] + [False]
+        self.state = self.initial
+        self.pending = False
+
+    def reset(self):
+        """Start matching a new input."""
+        self.state = self.initial
+        self.pending = False
+
+    def _run(self, state, data):
+        """Advance state over a bytes-like object, stopping at the sink."""
+        rows, sink = self.rows, self.sink
+        for byte in data:
+            state = rows[state][byte]
+            if state == sink:
+                break
+        return state
+
+    def feed(self, chunk):
+        """Consume the next chunk of the input."""
+        if self.state != self.sink:
+            self.state = self._run(self.state, memoryview(chunk).cast('B'))
+
+    @property
+    def accepted(self):
+        """Whether the input fed so far is accepted."""
+        return self.accepting[self.state]
+
+    def feed_lines(self, chunk):
+        """Consume a chunk of newline-separated records, yielding a result per completed line.
+
+        A line split across chunks is carried over; call finish_lines() at
+        the end of the input for a last line without a trailing newline.
+        """
+        view = memoryview(chunk).cast('B')
+        find = getattr(chunk, "find", None)
+        if find is None:  # memoryview has no find(); locate newlines byte by byte
+            positions = (i for i, byte in enumerate(view) if byte == 10)
+        else:
+            positions = _newlines(find)
+        start = 0
+        for end in positions:
+            if self.state != self.sink:
+                self.state = self._run(self.state, view[start:end])
+            yield self.accepting[self.state]
+            self.state = self.initial
+            self.pending = False
+            start = end + 1
+        if start < len(view):
+            self.pending = True
+            if self.state != self.sink:
+                self.state = self._run(self.state, view[start:])
+
+    def finish_lines(self):
+        """Return the result for a trailing line without a newline, or None."""
+        if not self.pending:
+            return None
+        result = self.accepting[self.state]
+        self.state = self.initial
+        self.pending = False
+        return result
+
+def _newlines(find):
+    """Yield successive b'\n' positions using a bytes-like object's find method."""
+    end = find(b'\n')
+    while end >= 0:
+        yield end
+        end = find(b'\n', end + 1)
+
+# Per-line matching of a file through a memory map
+def match_file_lines(path, dense):
+    """Yield (line_number, accepted) for every line of a file, in constant memory."""
+    matcher = StreamMatcher(dense)
+    with open(path, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty files cannot be mapped
+            return
+        with mm:
+            view = memoryview(mm)
+            try:
+                start = 0
+                line_number = 1
+                size = len(mm)
+                while start < size:
+                    end = mm.find(b'\n', start)
+                    if end < 0:
+                        end = size
+                    state = matcher._run(matcher.initial, view[start:end])
+                    yield line_number, matcher.accepting[state]
+                    line_number += 1
+                    start = end + 1
+            finally:
+                view.release()
@@ -1,34 +1,226 @@
 # generate_asm.py
 
-def generate_assembly(min_dfa_states, min_dfa_transitions, min_dfa_initial, min_dfa_accepting, alphabet, test_string):
-    state_to_int = {state: idx for idx, state in enumerate(min_dfa_states)}
-    num_states = len(min_dfa_states)
-    dead_state = num_states
+from charclass import symbol_range
+from dense_dfa import NO_STATE
+from dfa_analysis import live_states
+
+def build_byte_table(dense, tags=None):
+    """Expand the states of a minimal dense_dfa.DenseDFA into 256-column byte rows.
 
-    initial_state = state_to_int[min_dfa_initial]
-    accepting_states = {state_to_int[state] for state in min_dfa_accepting}
-    transitions = {}
-    for state in min_dfa_states:
-        transitions[state_to_int[state]] = {char: state_to_int[next_state] 
-                                            for char, next_state in min_dfa_transitions[state].items()}
+    Returns (trans, initial_state, accepting); the extra last row is a dead
+    state that every byte outside the alphabet leads to. Range symbols fill
+    every byte they cover; code points above 0xFF have no byte and are dropped.
+    accepting[i] is 1 for accepting states, or tags[state] + 1 when a
+    state -> rule number mapping is given (0 always means rejecting).
+    """
+    num_states = dense.num_states
+    dead_state = num_states
 
     trans = [[dead_state] * 256 for _ in range(num_states + 1)]
     for state in range(num_states):
-        for char in alphabet:
-            trans[state][ord(char)] = transitions[state][char]
+        row = trans[state]
+        for symbol, next_state in zip(dense.alphabet, dense.row(state)):
+            if next_state == NO_STATE:
+                continue
+            first, last = symbol_range(symbol)
+            for byte in range(first, min(last, 255) + 1):
+                row[byte] = next_state
+
+    accepting = [1 if dense.is_accepting(state) else 0 for state in range(num_states)] + [0]
+    if tags is not None:
+        for state, rule in tags.items():
+            accepting[state] = rule + 1
+    return trans, dense.initial, accepting
+
+def build_class_table(dense, tags=None):
+    """Compress the byte table by grouping bytes that behave identically in every state.
+
+    Returns (class_map, class_rows, initial_state, accepting): class_map
+    maps each of the 256 bytes to its equivalence class, and class_rows
+    holds one entry per class for every state (dead row included).
+    """
+    trans, initial_state, accepting = build_byte_table(dense, tags)
+    class_of_column = {}
+    class_map = []
+    representatives = []
+    for byte in range(256):
+        column = tuple(row[byte] for row in trans)
+        if column not in class_of_column:
+            class_of_column[column] = len(representatives)
+            representatives.append(byte)
+        class_map.append(class_of_column[column])
+    class_rows = [[row[byte] for byte in representatives] for row in trans]
+    return class_map, class_rows, initial_state, accepting
+
+def early_exit_rows(class_map, class_rows, accepting, terminator=None):
+    """Find the rows whose outcome is already decided.
+
+    Returns (class_rows, dead_state, sink_state). Entries leading to a row
+    that can no longer reach an accepting row are redirected to dead_state
+    (the last row). sink_state is an accepting row that every byte other
+    than terminator maps back to itself, or None if there is none.
+    """
+    dead_state = len(class_rows) - 1
+    live = live_states(range(len(class_rows)), lambda row: class_rows[row], [r for r, tag in enumerate(accepting) if tag])
+    class_rows = [[entry if entry in live else dead_state for entry in entries] for entries in class_rows]
+    classes = {class_map[byte] for byte in range(256) if byte != terminator}
+    sink_state = next((row for row, entries in enumerate(class_rows)
+                       if accepting[row] and all(entries[c] == row for c in classes)), None)
+    return class_rows, dead_state, sink_state
+
+DIRECT_MAX_STATES = 64  # Largest live state count for which 'auto' emits direct-coded assembly
+DIRECT_MAX_RUNS = 8     # Compare/branch runs per state before a direct-coded state uses a jump table
+
+# Shared tail of the validation programs: print the result and exit
+RESULT_CODE = """
+accept:
+    mov eax, 4
+    mov ebx, 1
+    mov ecx, accepted_str
+    mov edx, 10
+    int 0x80
+    jmp end
+
+reject:
+    mov eax, 4
+    mov ebx, 1
+    mov ecx, rejected_str
+    mov edx, 10
+    int 0x80
+    jmp end
+
+end:
+    mov eax, 1
+    mov ebx, 0
+    int 0x80
+"""
 
-    accepting = [1 if state in accepting_states else 0 for state in range(num_states + 1)]
+# Table entry size in bytes for a number of states: db, dw or dd
+def state_entry_width(num_rows):
+    if num_rows <= 0x100:
+        return 1
+    if num_rows <= 0x10000:
+        return 2
+    return 4
 
-    trans_table_str = "trans_table:\n"
-    for state in range(num_states + 1):
-        trans_table_str += "    db " + ", ".join(map(str, trans[state])) + "\n"
+def format_class_tables(class_map, class_rows, accepting):
+    """Return (data section text, entry width, class count) for the compressed tables."""
+    width = state_entry_width(len(class_rows))
+    directive = {1: "db", 2: "dw", 4: "dd"}[width]
+    data = "class_map:\n"
+    for start in range(0, 256, 32):
+        data += "    db " + ", ".join(map(str, class_map[start:start + 32])) + "\n"
+    data += f"\ntrans_table:    ; {len(class_rows)} states x {len(class_rows[0])} byte classes\n"
+    for row in class_rows:
+        data += f"    {directive} " + ", ".join(map(str, row)) + "\n"
+    data += "\naccepting_states:\n    db " + ", ".join(map(str, accepting)) + "\n"
+    return data, width, len(class_rows[0])
 
-    accepting_states_str = "accepting_states:\n    db " + ", ".join(map(str, accepting)) + "\n"
+def load_state(dest, table, index, width):
+    """Instruction loading a width-byte table entry into a 32-bit register."""
+    if width == 1:
+        return f"movzx {dest}, byte [{table} + {index}]"
+    if width == 2:
+        return f"movzx {dest}, word [{table} + {index}*2]"
+    return f"mov {dest}, [{table} + {index}*4]"
+
+# Table-driven or direct-coded validation program: heuristic choice
+def choose_backend(class_rows, initial_state, dead_state, sink_state):
+    """'direct' for automata with at most DIRECT_MAX_STATES coded states, else 'table'."""
+    coded = coded_states(class_rows, initial_state, dead_state, sink_state)
+    return "direct" if len(coded) <= DIRECT_MAX_STATES else "table"
+
+def coded_states(class_rows, initial_state, dead_state, sink_state):
+    """States reachable from initial_state that need code of their own, initial first.
+
+    The dead state and the accept sink need none: reaching them decides
+    the result at once.
+    """
+    order = [] if initial_state in (dead_state, sink_state) else [initial_state]
+    seen = set(order)
+    for state in order:
+        for target in class_rows[state]:
+            if target not in seen and target not in (dead_state, sink_state):
+                seen.add(target)
+                order.append(target)
+    return order
+
+def byte_runs(entries, class_map, skip_target):
+    """Maximal runs (first, last, target) of bytes 1..255 sharing a target, omitting skip_target."""
+    runs = []
+    for byte in range(1, 256):
+        target = entries[class_map[byte]]
+        if runs and runs[-1][2] == target and runs[-1][1] == byte - 1:
+            runs[-1] = (runs[-1][0], byte, target)
+        else:
+            runs.append((byte, byte, target))
+    return [run for run in runs if run[2] != skip_target]
+
+def direct_code(class_map, class_rows, initial_state, accepting, dead_state, sink_state):
+    """Return (text, data) of a direct-coded matcher over the NUL-terminated string at esi.
+
+    Every live state is a label. Its transitions are compare/branch
+    sequences on the byte in al, or an indirect jump through a per-state
+    table of labels when that would take more than DIRECT_MAX_RUNS
+    branches. Jumps into the dead state go to reject and jumps into the
+    accept sink go straight to accept.
+    """
+    def label(state):
+        if state == dead_state:
+            return "reject"
+        if state == sink_state:
+            return "accept"
+        return f"state_{state}"
+
+    order = coded_states(class_rows, initial_state, dead_state, sink_state)
+    text = "" if order else f"    jmp {label(initial_state)}\n"  # The initial state's code comes first
+    data = ""
+    for state in order:
+        entries = class_rows[state]
+        text += f"""
+{label(state)}:
+    movzx eax, byte [esi]
+    inc esi
+    test eax, eax
+    jz {"accept" if accepting[state] else "reject"}
+"""
+        runs = byte_runs(entries, class_map, dead_state)
+        if len(runs) > DIRECT_MAX_RUNS:
+            text += f"""    movzx ecx, byte [class_map + eax]
+    jmp dword [{label(state)}_jumps + ecx*4]
+"""
+            data += f"{label(state)}_jumps:\n    dd " + ", ".join(label(target) for target in entries) + "\n"
+            continue
+        for first, last, target in runs:
+            if first == last:
+                text += f"    cmp eax, {first}\n    je {label(target)}\n"
+            else:
+                text += f"    lea ecx, [eax - {first}]\n    cmp ecx, {last - first}\n    jbe {label(target)}\n"
+        text += "    jmp reject\n"
+    return text, data
+
+def generate_assembly(dense, test_string, backend="auto"):
+    """Emit a 32-bit Linux (NASM) program that prints whether test_string is accepted by a minimal DenseDFA.
+
+    backend is 'table' (a byte-class transition table walked in a loop),
+    'direct' (one code label per state, see direct_code) or 'auto', which
+    picks per DFA with choose_backend. Both print the same result.
+    """
+    if backend not in ("auto", "table", "direct"):
+        raise ValueError(f"Unknown assembly backend: {backend}")
+    class_map, class_rows, initial_state, accepting = build_class_table(dense)
+    class_rows, dead_state, sink_state = early_exit_rows(class_map, class_rows, accepting, terminator=0)
+    if backend == "auto":
+        backend = choose_backend(class_rows, initial_state, dead_state, sink_state)
     input_str_str = "input_str: db " + ", ".join(f"'{c}'" for c in test_string) + ", 0\n"
+    if backend == "direct":
+        return generate_direct_assembly(class_map, class_rows, initial_state, accepting, dead_state, sink_state,
+                                        input_str_str)
+    tables_str, width, num_classes = format_class_tables(class_map, class_rows, accepting)
+    sink_check = f"\n    cmp ebx, {sink_state}\n    je accept" if sink_state is not None else ""
 
     asm_code = f"""section .data
-{trans_table_str}
-{accepting_states_str}
+{tables_str}
 {input_str_str}
 accepted_str: db "Accepted", 10, 0
 rejected_str: db "Rejected", 10, 0
@@ -46,38 +238,522 @@ loop:
     je check_accept
 
     movzx eax, al
-    mov ecx, ebx
-    shl ecx, 8
+    movzx eax, byte [class_map + eax]
+    imul ecx, ebx, {num_classes}
     add ecx, eax
-    mov bl, [trans_table + ecx]
-    movzx ebx, bl
+    {load_state("ebx", "trans_table", "ecx", width)}
     inc esi
+    cmp ebx, {dead_state}           ; dead state: no accepting state is reachable
+    je reject{sink_check}
     jmp loop
 
 check_accept:
     cmp byte [accepting_states + ebx], 1
     je accept
     jmp reject
+{RESULT_CODE}"""
+    return asm_code
 
-accept:
-    mov eax, 4
-    mov ebx, 1
-    mov ecx, accepted_str
-    mov edx, 10
-    int 0x80
-    jmp end
+def generate_direct_assembly(class_map, class_rows, initial_state, accepting, dead_state, sink_state, input_str_str):
+    """The direct-coded variant of generate_assembly's validation program."""
+    text, jump_tables = direct_code(class_map, class_rows, initial_state, accepting, dead_state, sink_state)
+    class_map_str = ""
+    if jump_tables:
+        class_map_str = "class_map:\n" + "".join(
+            "    db " + ", ".join(map(str, class_map[start:start + 32])) + "\n" for start in range(0, 256, 32)
+        ) + "\n" + jump_tables
+    return f"""section .data
+{class_map_str}
+{input_str_str}
+accepted_str: db "Accepted", 10, 0
+rejected_str: db "Rejected", 10, 0
 
-reject:
-    mov eax, 4
-    mov ebx, 1
-    mov ecx, rejected_str
-    mov edx, 10
-    int 0x80
-    jmp end
+section .text
+global _start
 
-end:
-    mov eax, 1
-    mov ebx, 0
-    int 0x80
+_start:
+    mov esi, input_str
+{text}{RESULT_CODE}"""
+
+
+def generate_stream_assembly(dense, mode="lines", fd=0, buffer_size=65536):
+    """Emit an x86-64 Linux (NASM) matcher that filters an input stream through a minimal DenseDFA.
+
+    The program reads file descriptor fd with large buffered read syscalls
+    and runs the DFA over every newline-delimited record. In 'lines' mode it
+    writes "Accepted" or "Rejected" per record to stdout (through an output
+    buffer); in 'count' mode it writes only the number of accepted records.
+    A final record without a trailing newline is still matched.
+    """
+    if mode not in ("lines", "count"):
+        raise ValueError(f"Unknown stream mode: {mode}")
+    class_map, class_rows, initial_state, accepting = build_class_table(dense)
+    class_rows, dead_state, sink_state = early_exit_rows(class_map, class_rows, accepting, terminator=10)
+    tables_str, width, num_classes = format_class_tables(class_map, class_rows, accepting)
+    sink_check = f"\n    cmp r12d, {sink_state}\n    je skip_record" if sink_state is not None else ""
+
+    if mode == "lines":
+        emit_result = """emit_result:
+    ; Append "Accepted\\n" or "Rejected\\n" (9 bytes) to the output buffer
+    cmp r14, OUT_SIZE - 9
+    jbe .room
+    call flush
+.room:
+    lea rdx, [rel rejected_str]
+    lea rax, [rel accepted_str]
+    cmp byte [r9 + r12], 1
+    cmove rdx, rax
+    lea rax, [rel out_buf]
+    mov rcx, [rdx]
+    mov [rax + r14], rcx
+    mov cl, [rdx + 8]
+    mov [rax + r14 + 8], cl
+    add r14, 9
+    ret
+"""
+        finish = ""
+    else:
+        emit_result = """emit_result:
+    ; Count accepted records
+    cmp byte [r9 + r12], 1
+    jne .done
+    inc r15
+.done:
+    ret
+"""
+        finish = """    ; Format the accepted count in decimal followed by a newline
+    lea rdi, [rel out_buf + 32]
+    mov byte [rdi], 10
+    mov rax, r15
+    mov ecx, 10
+.digit:
+    xor edx, edx
+    div rcx
+    add dl, '0'
+    dec rdi
+    mov [rdi], dl
+    test rax, rax
+    jnz .digit
+    lea rax, [rel out_buf + 33]
+    sub rax, rdi
+    mov r14, rax
+    lea rsi, [rel out_buf]
+    mov rcx, r14
+    ; Move the digits to the start of the buffer
+.shift:
+    mov dl, [rdi]
+    mov [rsi], dl
+    inc rdi
+    inc rsi
+    dec rcx
+    jnz .shift
+"""
+
+    asm_code = f"""; x86-64 Linux stream matcher: nasm -f elf64 regex_stream.asm && ld -o regex_stream regex_stream.o
+BUF_SIZE equ {buffer_size}
+OUT_SIZE equ {buffer_size}
+INPUT_FD equ {fd}
+
+section .data
+{tables_str}
+accepted_str: db "Accepted", 10
+rejected_str: db "Rejected", 10
+
+section .bss
+in_buf: resb BUF_SIZE
+out_buf: resb OUT_SIZE
+
+section .text
+global _start
+
+; Register use:
+;   r8  = trans_table        r9  = accepting_states      r10 = class_map
+;   r12 = current DFA state  r13 = 1 while a record has unread bytes
+;   r14 = output buffer fill r15 = accepted record count
+;   rsi = input cursor       rbx = end of the bytes in in_buf
+_start:
+    lea r8, [rel trans_table]
+    lea r9, [rel accepting_states]
+    lea r10, [rel class_map]
+    mov r12d, {initial_state}
+    xor r13d, r13d
+    xor r14d, r14d
+    xor r15d, r15d
+
+read_chunk:
+    mov eax, 0                  ; sys_read
+    mov edi, INPUT_FD
+    lea rsi, [rel in_buf]
+    mov edx, BUF_SIZE
+    syscall
+    cmp rax, 0
+    je end_of_input
+    jl read_error
+    lea rsi, [rel in_buf]
+    lea rbx, [rsi + rax]
+
+scan:
+    cmp rsi, rbx
+    jae read_chunk
+    movzx eax, byte [rsi]
+    inc rsi
+    cmp al, 10
+    je end_record
+    mov r13d, 1
+    movzx eax, byte [r10 + rax]
+    imul ecx, r12d, {num_classes}
+    add ecx, eax
+    {load_state("r12d", "r8", "rcx", width)}
+    cmp r12d, {dead_state}
+    je skip_record{sink_check}
+    jmp scan
+
+skip_record:
+    ; The record's result can no longer change: jump past its newline
+    mov rcx, rbx
+    sub rcx, rsi
+    jz read_chunk
+    mov rdi, rsi
+    mov al, 10
+    repne scasb
+    mov rsi, rdi
+    je end_record
+    jmp read_chunk
+
+end_record:
+    call emit_result
+    mov r12d, {initial_state}
+    xor r13d, r13d
+    jmp scan
+
+end_of_input:
+    test r13d, r13d
+    jz finish
+    call emit_result
+
+finish:
+{finish}    call flush
+    mov eax, 60                 ; sys_exit
+    xor edi, edi
+    syscall
+
+read_error:
+    call flush
+    mov eax, 60
+    mov edi, 1
+    syscall
+
+{emit_result}
+flush:
+    ; Write out_buf[0:r14] to stdout, retrying on short writes
+    push rsi
+    push rdi
+    push rdx
+    lea rsi, [rel out_buf]
+.write_more:
+    test r14, r14
+    jz .flushed
+    mov eax, 1                  ; sys_write
+    mov edi, 1
+    mov rdx, r14
+    syscall
+    cmp rax, 0
+    jle .flushed
+    add rsi, rax
+    sub r14, rax
+    jmp .write_more
+.flushed:
+    xor r14d, r14d
+    pop rdx
+    pop rdi
+    pop rsi
+    ret
+"""
+    return asm_code
+
+
+def generate_lexer_assembly(dense, tags, rule_names, skip=(), fd=0, buffer_size=65536):
+    """Emit an x86-64 Linux (NASM) maximal-munch tokenizer for a tagged lexer DFA.
+
+    tags maps the accepting states of dense to rule indices (see lexer.build_lexer_dfa)
+    and rule_names lists the rules in priority order. For every token the
+    program writes "<rule name>\\t<byte offset>\\t<length>\\n"; rules named in
+    skip are matched but not written. Input is read in buffer_size chunks and
+    the unfinished token is slid to the front of the buffer before each
+    read. Exit status is 0 on success, 1 if no rule matches (after writing
+    "error\\t<offset>") or on a read error, and 2 if a token exceeds the buffer.
+    """
+    if len(rule_names) > 255:
+        raise ValueError("The assembly lexer supports at most 255 rules")
+    class_map, class_rows, initial_state, accepting = build_class_table(dense, tags)
+
+    # Send every state that can no longer reach an accepting state to the dead row
+    class_rows, dead_state, _ = early_exit_rows(class_map, class_rows, accepting)
+    tables_str, width, num_classes = format_class_tables(class_map, class_rows, accepting)
+
+    encoded_names = [name.encode("utf-8") for name in rule_names]
+    offsets = []
+    position = 0
+    for name in encoded_names:
+        offsets.append(position)
+        position += len(name)
+    name_text = b"".join(encoded_names)
+    record_max = max(map(len, encoded_names)) + 2 * 20 + 3
+    skipped = [1 if name in skip else 0 for name in rule_names]
+
+    asm_code = f"""; x86-64 Linux tokenizer: nasm -f elf64 regex_lexer.asm && ld -o regex_lexer regex_lexer.o
+BUF_SIZE equ {buffer_size}
+OUT_SIZE equ {max(buffer_size, 2 * record_max)}
+RECORD_MAX equ {record_max}
+INPUT_FD equ {fd}
+DEAD_STATE equ {dead_state}
+
+section .data
+{tables_str}
+rule_skip:
+    db {", ".join(map(str, skipped))}
+rule_name_offsets:
+    dd {", ".join(map(str, offsets))}
+rule_name_lengths:
+    dd {", ".join(str(len(name)) for name in encoded_names)}
+rule_name_text:
+    db {", ".join(map(str, name_text)) or "0"}
+error_str: db "error", 9
+
+section .bss
+in_buf: resb BUF_SIZE
+out_buf: resb OUT_SIZE
+digits: resb 24
+base_offset: resq 1
+at_eof: resb 1
+
+section .text
+global _start
+
+; accepting_states holds rule + 1 for accepting states and 0 otherwise.
+; Register use:
+;   r8  = trans_table        r9  = accepting_states       r10 = class_map
+;   r12 = current DFA state  r13 = end of the longest match so far (0 if none)
+;   r14 = output buffer fill r15 = rule + 1 of the longest match
+;   rbp = token start        rsi = scan cursor            rbx = end of the bytes in in_buf
+_start:
+    lea r8, [rel trans_table]
+    lea r9, [rel accepting_states]
+    lea r10, [rel class_map]
+    xor r14d, r14d
+    lea rbp, [rel in_buf]
+    mov rbx, rbp
+
+next_token:
+    cmp rbp, rbx
+    jb .start
+    cmp byte [rel at_eof], 0
+    jne finish
+    mov rsi, rbp
+    xor r13d, r13d
+    call refill
+    jmp next_token
+.start:
+    mov rsi, rbp
+    mov r12d, {initial_state}
+    xor r13d, r13d
+
+scan:
+    cmp rsi, rbx
+    jb .byte
+    cmp byte [rel at_eof], 0
+    jne token_end
+    call refill
+    jmp scan
+.byte:
+    movzx eax, byte [rsi]
+    inc rsi
+    movzx eax, byte [r10 + rax]
+    imul ecx, r12d, {num_classes}
+    add ecx, eax
+    {load_state("r12d", "r8", "rcx", width)}
+    cmp r12d, DEAD_STATE
+    je token_end
+    movzx eax, byte [r9 + r12]
+    test eax, eax
+    jz scan
+    mov r13, rsi
+    mov r15d, eax
+    jmp scan
+
+token_end:
+    ; Emit the longest match and restart right after it
+    test r13, r13
+    jz no_match
+    lea rax, [rel rule_skip]
+    cmp byte [rax + r15 - 1], 0
+    jne .skipped
+    call emit_token
+.skipped:
+    mov rbp, r13
+    jmp next_token
+
+finish:
+    call flush
+    mov eax, 60                 ; sys_exit
+    xor edi, edi
+    syscall
+
+no_match:
+    ; Report "error\\t<offset>\\n" for the position no rule matches
+    call flush
+    lea rdi, [rel out_buf]
+    lea rsi, [rel error_str]
+    mov ecx, 6
+    rep movsb
+    call token_offset
+    call append_decimal
+    mov byte [rdi], 10
+    inc rdi
+    lea rax, [rel out_buf]
+    sub rdi, rax
+    mov r14, rdi
+    call flush
+    mov eax, 60
+    mov edi, 1
+    syscall
+
+read_error:
+    call flush
+    mov eax, 60
+    mov edi, 1
+    syscall
+
+overflow:
+    call flush
+    mov eax, 60
+    mov edi, 2
+    syscall
+
+refill:
+    ; Slide the current token [rbp, rbx) to the front of in_buf and read more input after it
+    lea rdi, [rel in_buf]
+    mov rcx, rbp
+    sub rcx, rdi                ; distance the token moves
+    add [rel base_offset], rcx
+    sub rsi, rcx
+    sub rbx, rcx
+    test r13, r13
+    jz .moved
+    sub r13, rcx
+.moved:
+    push rsi
+    mov rsi, rbp
+    mov rcx, rbx
+    sub rcx, rdi
+    rep movsb
+    lea rbp, [rel in_buf]
+    lea rdx, [rel in_buf + BUF_SIZE]
+    sub rdx, rbx                ; free space after the token
+    jz overflow
+    mov eax, 0                  ; sys_read
+    mov edi, INPUT_FD
+    mov rsi, rbx
+    syscall
+    pop rsi
+    cmp rax, 0
+    jl read_error
+    jne .got
+    mov byte [rel at_eof], 1
+    ret
+.got:
+    add rbx, rax
+    ret
+
+token_offset:
+    ; rax = absolute input offset of the token start
+    lea rax, [rel in_buf]
+    mov rdx, rbp
+    sub rdx, rax
+    mov rax, [rel base_offset]
+    add rax, rdx
+    ret
+
+emit_token:
+    ; Append "<rule name>\\t<offset>\\t<length>\\n" to the output buffer
+    cmp r14, OUT_SIZE - RECORD_MAX
+    jbe .room
+    call flush
+.room:
+    lea rdi, [rel out_buf]
+    add rdi, r14
+    push rsi
+    lea rax, [rel rule_name_offsets]
+    mov esi, [rax + r15*4 - 4]
+    lea rax, [rel rule_name_text]
+    add rsi, rax
+    lea rax, [rel rule_name_lengths]
+    mov ecx, [rax + r15*4 - 4]
+    rep movsb
+    pop rsi
+    mov byte [rdi], 9
+    inc rdi
+    call token_offset
+    call append_decimal
+    mov byte [rdi], 9
+    inc rdi
+    mov rax, r13
+    sub rax, rbp
+    call append_decimal
+    mov byte [rdi], 10
+    inc rdi
+    lea rax, [rel out_buf]
+    sub rdi, rax
+    mov r14, rdi
+    ret
+
+append_decimal:
+    ; Write rax in decimal at rdi and advance rdi
+    push rbx
+    lea r11, [rel digits + 24]
+    mov rcx, r11
+    mov ebx, 10
+.digit:
+    xor edx, edx
+    div rbx
+    add dl, '0'
+    dec rcx
+    mov [rcx], dl
+    test rax, rax
+    jnz .digit
+.copy:
+    mov dl, [rcx]
+    mov [rdi], dl
+    inc rdi
+    inc rcx
+    cmp rcx, r11
+    jb .copy
+    pop rbx
+    ret
+
+flush:
+    ; Write out_buf[0:r14] to stdout, retrying on short writes
+    push rsi
+    push rdi
+    push rdx
+    lea rsi, [rel out_buf]
+.write_more:
+    test r14, r14
+    jz .flushed
+    mov eax, 1                  ; sys_write
+    mov edi, 1
+    mov rdx, r14
+    syscall
+    cmp rax, 0
+    jle .flushed
+    add rsi, rax
+    sub r14, rax
+    jmp .write_more
+.flushed:
+    xor r14d, r14d
+    pop rdx
+    pop rdi
+    pop rsi
+    ret
 """
     return asm_code
@@ -1,61 +1,34 @@
 #!/bin/bash
 
-# Ensure output directories exist
-mkdir -p output
-mkdir -p regex_outputs
-mkdir -p /Users/siddharthsingh/Documents/Compilers-Project/minimal_dfa_graphs
-
-# Define arrays of expressions and test strings
-infix_expressions=(
-  "(a|b)*.a.b.b"
-  "(a|b).(c+).d?"
-  "(a.b)*.(c|d+)"
-  "a.(b|c|d).(e*)"
-  "(a+).(b.c)?.d"
-  "a.(b+|c.c|d*).f?"
-)
-
-test_strings=(
-  "abb"
-  "bcccd"
-  "ababcd"
-  "adeee"
-  "ad"
-  "acbf"
-)
-
-# Number of test cases
-num_tests=${#infix_expressions[@]}
-
-# Loop through each test
-for (( i=0; i<$num_tests; i++ ))
-do
-  infix="${infix_expressions[$i]}"
-  test_str="${test_strings[$i]}"
-  echo "Running test $((i+1))..."
-
-  # Create a temporary input file
-  echo -e "$infix\n$test_str" > temp_input.txt
-
-  # Run main.py using the temp input file with test index as argument
-  python3 main.py $((i+1)) < temp_input.txt > "output/output_$((i+1)).txt"
-
-  # Move the generated asm file
-  mv regex.asm "regex_outputs/regex_$((i+1)).asm"
-
-  # Generate corresponding graphs from the .dot files
-  dot_file="/Users/siddharthsingh/Documents/Compilers-Project/minimal_dfa_graphs/graph$((i+1)).dot"
-  png_file="/Users/siddharthsingh/Documents/Compilers-Project/minimal_dfa_graphs/graph$((i+1)).png"
-
-  # Check if .dot file exists and generate the corresponding .png
-  if [[ -f "$dot_file" ]]; then
+# Compile every (pattern, test strings) job of the manifest in one
+# in-process batch run; each job writes its tables, .asm and .dot files
+# into its own directory under a fresh batch_outputs/run-* directory, so
+# overlapping runs never write into the same place
+manifest="${1:-testing_manifest.jsonl}"
+if [[ -n "$2" ]]; then
+  out_dir="$2"
+else
+  mkdir -p batch_outputs
+  out_dir="$(mktemp -d "batch_outputs/run-$(date +%Y%m%d-%H%M%S)-XXXXXX")"
+fi
+
+python3 batch_driver.py "$manifest" --out-dir "$out_dir"
+status=$?
+
+# Deterministic work counters gate the run; the timing-based scaling check is advisory only
+python3 benchmark.py --check-counts || status=1
+python3 benchmark.py --check-scaling || echo "Advisory: scaling check failed (timing-based, may be noise)"
+
+# Generate graphs from the .dot files
+if command -v dot > /dev/null; then
+  for dot_file in "$out_dir"/*/graph.dot; do
+    [[ -f "$dot_file" ]] || continue
     echo "Generating graph from $dot_file"
-    dot -Tpng "$dot_file" -o "$png_file"
-  else
-    echo "No .dot file found for graph$((i+1)).dot"
-  fi
-done
+    dot -Tpng "$dot_file" -o "${dot_file%.dot}.png"
+  done
+else
+  echo "Graphviz 'dot' not found; skipping .png generation"
+fi
 
-# Cleanup
-rm temp_input.txt
 echo "All tests completed!"
+exit $status